@@ -1,19 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
-# Add src to path
+# Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.nlu.intent_classifier import IntentClassifier
-from src.dialogue.state_machine import DialogueManager
-from src.tools.bank_api_adapter import BankingAPIAdapter
-from src.data.pii_handler import redactor
+from core.config import load_config
+from core.metrics_collector import Histogram
+from nlu.intent_classifier import WARMUP_LENGTHS, IntentClassifier, resolve_load_path
+from nlu.baseline_classifier import BaselineClassifier
+from nlu.cascade import CascadeClassifier
+from nlu.batching import BatchScheduler
+from nlu.worker_pool import InferenceWorkerPool
+from nlu.tokenizer import BankingTokenizer
+from nlu.ner_extractor import NERExtractor
+from nlu.sentence_encoder import SentenceEncoder
+from dialogue.state_machine import DialogueManager
+from dialogue.session_store import SessionStore
+from tools.bank_api_adapter import BankingAPIAdapter
+from tools.faq_retriever import ENTRIES_FILE, FAQRetriever
+from data_src.pii_handler import redactor
 
 # Import schemas
-from api.schemas import ChatRequest, ChatResponse, HealthResponse, MetricsResponse
+from api.schemas import ChatRequest, ChatResponse, HealthResponse, MetricsResponse, ReadinessResponse
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -32,47 +45,230 @@ app.add_middleware(
 )
 
 # Global chatbot instance
+config = load_config()
 chatbot_manager = None
+intent_scheduler = None
+worker_pool = None
+service_ready = False
+startup_error = None
+startup_phases = {}  # phase name -> milliseconds
 metrics = {
     "total_conversations": 0,
     "avg_confidence": 0.0,
     "fallback_count": 0,
     "total_messages": 0,
 }
+STAGE_MS_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+stage_latency = {}  # stage ("tokenize_ms", "intent_ms", "ner_ms", "total_ms") -> Histogram of per-turn ms
+
+@contextmanager
+def startup_phase(name: str):
+    """Time one startup phase; durations are logged and reported by /ready."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_phases[name] = round((time.perf_counter() - start) * 1000, 1)
+        print(f"⏱  {name}: {startup_phases[name]:.0f} ms")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize chatbot on startup."""
-    global chatbot_manager
+    """Initialize chatbot on startup.
+
+    The service only reports ready (/ready) once the model is loaded and
+    warmed up. If the trained model cannot be loaded it stays not-ready
+    instead of serving an untrained one.
+    """
+    global chatbot_manager, intent_scheduler, worker_pool, service_ready, startup_error
 
     try:
         print("🚀 Starting Banking Chatbot API...")
+        started = time.perf_counter()
+
+        serving = config.get("serving", {})
+        tokenizer = ner_extractor = faq_retriever = None
+        cache = serving.get("prediction_cache", {})
+        warmup = serving.get("warmup", {})
+        batching = serving.get("batching", {})
+        model_paths = config.get("models", {})
+        # Relative model paths are under the project root, wherever the server was started from
+        intent_model_path = resolve_load_path(model_paths.get("intent_classifier", "models/distilbert_intent"))
+        intent_classifier = None
+
+        with startup_phase("load_intent_model"):
+            # Serve the intent model from a pool of pinned worker processes
+            pool = serving.get("worker_pool", {})
+            if pool.get("enabled", False):
+                try:
+                    worker_pool = InferenceWorkerPool(
+                        intent_model_path,
+                        num_workers=pool.get("num_workers", 0),
+                        threads_per_worker=pool.get("threads_per_worker", 4),
+                        backend=serving.get("backend", "torch"),
+                        quantize=serving.get("quantization", {}).get("enabled", False),
+                        pin_cores=pool.get("pin_cores", True),
+                        cache_size=cache.get("max_size", 0),
+                        cache_ttl=cache.get("ttl_seconds"),
+                        warmup=warmup.get("enabled", True),
+                        warmup_lengths=warmup.get("lengths", WARMUP_LENGTHS),
+                        warmup_batch_sizes=(1, batching.get("max_batch_size", 32)),
+                        request_timeout=pool.get("request_timeout_seconds", 30.0),
+                    )
+                    worker_pool.start()
+                    intent_classifier = worker_pool
+                except Exception as e:
+                    worker_pool = None
+                    print(f"⚠️  Worker pool disabled, could not start workers: {e}")
+
+            if intent_classifier is None:
+                intent_classifier = IntentClassifier(
+                    cache_size=cache.get("max_size", 0),
+                    cache_ttl=cache.get("ttl_seconds"),
+                )
+                # Raises if there is no trained model; the service then never becomes ready
+                intent_classifier.load_model(
+                    intent_model_path,
+                    backend=serving.get("backend", "torch"),
+                    intra_op_threads=serving.get("intra_op_threads", 0),
+                    quantize=serving.get("quantization", {}).get("enabled", False),
+                    mmap_weights=serving.get("mmap_weights", True),
+                )
+                print("✓ Loaded trained intent classifier")
+
+        # Answer informational intents from the FAQ embedding index instead of the backend
+        faq = serving.get("faq", {})
+        if faq.get("enabled", False):
+            with startup_phase("load_faq"):
+                try:
+                    # Reuse the in-process intent model's encoder rather than loading a second copy
+                    shared = isinstance(intent_classifier, IntentClassifier) and intent_classifier.backend == "torch" \
+                        and not intent_classifier.quantized
+                    encoder = SentenceEncoder(
+                        intent_model_path,
+                        model=intent_classifier.model.base_model if shared else None,
+                        tokenizer=intent_classifier.tokenizer,
+                    )
+                    faq_retriever = FAQRetriever(
+                        encoder,
+                        use_ann=faq.get("use_ann"),
+                        nprobe=faq.get("nprobe", 8),
+                        rerank=faq.get("rerank", 0),
+                    )
+                    index_dir = Path(resolve_load_path(model_paths.get("faq_index", "models/faq_index")))
+                    if (index_dir / ENTRIES_FILE).exists():
+                        faq_retriever.load_index(index_dir)
+                    else:
+                        faq_retriever.build_index()
+                    min_score = faq.get("min_score")
+                    min_score = min_score if min_score is not None else faq_retriever.min_score
+                    if min_score is None:
+                        raise ValueError("no calibrated min_score; build the index with scripts/train_all.py")
+                    faq_retriever.min_score = min_score
+                    print(f"✓ FAQ retrieval enabled ({len(faq_retriever.faq_db)} entries, min_score={min_score:.3f})")
+                except Exception as e:
+                    faq_retriever = None
+                    print(f"⚠️  FAQ retrieval disabled: {e}")
 
-        # Load intent classifier
-        intent_classifier = IntentClassifier()
+        # Tokenize each message once; the spaCy doc feeds NER, the BERT ids feed the intent model
+        ner = serving.get("ner", {})
+        if ner.get("enabled", False):
+            with startup_phase("load_ner"):
+                try:
+                    spacy_model = ner.get("spacy_model", "en_core_web_sm")
+                    tokenizer = BankingTokenizer(spacy_model=spacy_model, bert_tokenizer=intent_classifier.tokenizer)
+                    ner_extractor = NERExtractor(spacy_model, nlp=tokenizer.spacy_nlp, use_rules=ner.get("rules", True))
+                    print(f"✓ NER enabled (spaCy components: {', '.join(tokenizer.spacy_nlp.pipe_names)})")
+                except Exception as e:
+                    tokenizer = ner_extractor = None
+                    print(f"⚠️  NER disabled, could not load spaCy: {e}")
 
-        try:
-            intent_classifier.load_model("models/distilbert_intent")
-            print("✓ Loaded trained intent classifier")
-        except Exception as e:
-            print(f"⚠️  Could not load trained model: {e}")
-            print("   Using untrained model - please train first with: python scripts/train_all.py")
+        # Route easy messages to the TF-IDF baseline, DistilBERT only on low confidence
+        cascade = serving.get("cascade", {})
+        if cascade.get("enabled", False):
+            with startup_phase("load_cascade"):
+                try:
+                    baseline = BaselineClassifier()
+                    baseline.load(resolve_load_path(model_paths.get("baseline", "models/baseline_tfidf")))
+                    intent_classifier = CascadeClassifier(baseline, intent_classifier, threshold=cascade.get("threshold"))
+                    print(f"✓ Cascade enabled (threshold={intent_classifier.threshold:.3f})")
+                except Exception as e:
+                    print(f"⚠️  Cascade disabled, could not load baseline: {e}")
+
+        # Run representative synthetic batches so first requests don't pay for allocation/kernel selection
+        if warmup.get("enabled", True):
+            with startup_phase("warmup"):
+                if hasattr(intent_classifier, "warmup"):
+                    intent_classifier.warmup(
+                        lengths=warmup.get("lengths", WARMUP_LENGTHS),
+                        batch_sizes=(1, batching.get("max_batch_size", 32)),
+                    )
+                if faq_retriever:
+                    faq_retriever.retrieve("How long do transfers take?")
+                if ner_extractor:
+                    # Rules leave "Acme" and "Friday" unresolved, so spaCy runs too
+                    ner_extractor.extract_entities("Transfer $50 from savings to Acme on Friday")
+
+        # Batch concurrent /chat predictions into shared forward passes
+        if batching.get("enabled", False):
+            with startup_phase("start_batching"):
+                intent_scheduler = BatchScheduler(
+                    intent_classifier.predict_batch,
+                    max_batch_size=batching.get("max_batch_size", 32),
+                    max_wait_ms=batching.get("max_wait_ms", 5.0),
+                    # One batch in flight per worker process
+                    max_concurrent_batches=worker_pool.num_workers if worker_pool else 1,
+                )
+                await intent_scheduler.start()
+                print(f"✓ Intent batching enabled (max_batch_size={intent_scheduler.max_batch_size})")
 
         # Initialize backend adapter
         backend = BankingAPIAdapter()
 
+        # Bounded session state: idle TTL, LRU cap and memory budget, expired in the background
+        sessions = config.get("dialogue", {}).get("sessions", {})
+        session_store = SessionStore(
+            max_sessions=sessions.get("max_sessions", 100000),
+            ttl_seconds=sessions.get("ttl_seconds", 1800),
+            max_memory_mb=sessions.get("max_memory_mb"),
+            expiry_interval_seconds=sessions.get("expiry_interval_seconds", 30),
+        )
+        await session_store.start()
+
         # Initialize dialogue manager
         chatbot_manager = DialogueManager(
             intent_classifier=intent_classifier,
-            backend_adapter=backend
+            ner_extractor=ner_extractor,
+            backend_adapter=backend,
+            intent_scheduler=intent_scheduler,
+            tokenizer=tokenizer,
+            faq_retriever=faq_retriever,
+            faq_intents=faq.get("intents", ()),
+            session_store=session_store,
+            max_turns=config.get("dialogue", {}).get("max_turns", 20),
+            max_workers=serving.get("dialogue_workers", 0),
         )
 
-        print("✓ Chatbot initialized successfully")
+        startup_phases["total"] = round((time.perf_counter() - started) * 1000, 1)
+        service_ready = True
+        print(f"✓ Chatbot initialized successfully in {startup_phases['total']:.0f} ms")
         print("✓ API ready at http://localhost:8000")
         print("✓ Docs at http://localhost:8000/docs")
 
     except Exception as e:
+        startup_error = f"{type(e).__name__}: {e}"
         print(f"❌ Error initializing chatbot: {e}")
+        print("   Service will not report ready. Train first with: python scripts/train_all.py")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers."""
+    if intent_scheduler:
+        await intent_scheduler.stop()
+    if chatbot_manager:
+        await chatbot_manager.sessions.stop()
+        chatbot_manager.close()
+    if worker_pool:
+        worker_pool.close()
 
 @app.get("/")
 async def root():
@@ -93,17 +289,24 @@ async def health_check():
         version="1.0.0"
     )
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """Readiness probe: 503 until the model is loaded and warmed up."""
+    if not service_ready:
+        response.status_code = 503
+    return ReadinessResponse(ready=service_ready, startup_ms=startup_phases, error=startup_error)
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     """Main chat endpoint - Process user message."""
 
-    if not chatbot_manager:
-        raise HTTPException(status_code=503, detail="Chatbot not initialized. Train model first: python scripts/train_all.py")
+    if not service_ready:
+        raise HTTPException(status_code=503, detail="Chatbot not ready. Check /ready; train the model first if needed: python scripts/train_all.py")
 
     try:
         clean_message, pii_found = redactor.redact(request.message)
 
-        result = chatbot_manager.process_message(
+        result = await chatbot_manager.process_message_async(
             session_id=request.session_id,
             user_message=clean_message
         )
@@ -111,6 +314,8 @@ async def chat(request: ChatRequest):
         safe_response, _ = redactor.redact(result["response"])
 
         metrics["total_messages"] += 1
+        for stage, ms in result.get("timings", {}).items():
+            stage_latency.setdefault(stage, Histogram(STAGE_MS_BUCKETS)).observe(ms)
         metrics["total_conversations"] = len(chatbot_manager.sessions)
 
         return ChatResponse(
@@ -142,18 +347,35 @@ async def get_metrics():
         total_conversations=metrics["total_conversations"],
         avg_confidence=metrics["avg_confidence"],
         fallback_rate=0.0,
-        avg_response_time_ms=0.5
+        avg_response_time_ms=stage_latency["total_ms"].get_summary()["mean"] if "total_ms" in stage_latency else 0.0,
+        batching=intent_scheduler.get_summary() if intent_scheduler else None,
+        worker_pool=worker_pool.get_summary() if worker_pool else None,
+        sessions=chatbot_manager.sessions.get_summary(),
+        stages={stage: histogram.get_summary() for stage, histogram in stage_latency.items()},
+        prediction_cache=(
+            chatbot_manager.intent_classifier.cache.get_summary()
+            if chatbot_manager.intent_classifier.cache else None
+        ),
+        cascade=(
+            chatbot_manager.intent_classifier.get_summary()
+            if isinstance(chatbot_manager.intent_classifier, CascadeClassifier) else None
+        ),
     )
 
 @app.get("/sessions")
-async def get_sessions():
-    """Get active sessions."""
+async def get_sessions(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """Get active sessions, least recently active first, one page at a time."""
     if not chatbot_manager:
-        return {"sessions": [], "total": 0}
+        return {"sessions": [], "total": 0, "offset": offset, "limit": limit, "next_offset": None}
 
+    page = chatbot_manager.sessions.page(offset, limit)
+    total = len(chatbot_manager.sessions)
     return {
-        "sessions": list(chatbot_manager.sessions.keys()),
-        "total": len(chatbot_manager.sessions)
+        "sessions": page,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + len(page) if offset + len(page) < total else None,
     }
 
 if __name__ == "__main__":
@@ -20,8 +20,19 @@ class HealthResponse(BaseModel):
     timestamp: datetime
     version: str
 
+class ReadinessResponse(BaseModel):
+    ready: bool
+    startup_ms: Dict[str, float] = Field(default_factory=dict, description="Time spent in each startup phase")
+    error: Optional[str] = None
+
 class MetricsResponse(BaseModel):
     total_conversations: int
     avg_confidence: float
     fallback_rate: float
     avg_response_time_ms: float
+    batching: Optional[Dict] = None
+    worker_pool: Optional[Dict] = None
+    sessions: Optional[Dict] = None
+    stages: Optional[Dict] = None
+    prediction_cache: Optional[Dict] = None
+    cascade: Optional[Dict] = None
@@ -0,0 +1,21 @@
+"""Configuration loading."""
+from pathlib import Path
+from typing import Dict, Optional
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG_PATH = PROJECT_ROOT / "config" / "config.yaml"
+
+
+def load_config(path: Optional[str] = None) -> Dict:
+    """Load the YAML config; returns an empty dict if the file does not exist."""
+    config_path = Path(path) if path else DEFAULT_CONFIG_PATH
+    if not config_path.is_absolute():
+        config_path = PROJECT_ROOT / config_path
+
+    if not config_path.exists():
+        return {}
+
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f) or {}
@@ -1,6 +1,7 @@
+from bisect import bisect_left
 from collections import defaultdict
 import numpy as np
-from typing import Dict
+from typing import Dict, List
 
 class MetricsCollector:
     """Collect telemetry metrics."""
@@ -32,3 +33,26 @@ class MetricsCollector:
             "p95_latency": np.percentile(self.response_times, 95) if self.response_times else 0,
             "fallback_rate": self.fallback_count / max(sum(self.intent_counts.values()), 1),
         }
+
+class Histogram:
+    """Fixed-bucket histogram; each count is for values <= its upper bound."""
+
+    def __init__(self, buckets: List[float]):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def get_summary(self) -> Dict:
+        buckets = {f"le_{b:g}": c for b, c in zip(self.buckets, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": buckets,
+        }
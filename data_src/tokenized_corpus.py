@@ -0,0 +1,169 @@
+"""Pre-tokenized, memory-mapped intent corpora.
+
+A corpus directory holds every example's token ids back to back in
+``tokens.bin`` (int32), an ``offsets.npy`` index into it and ``labels.npy``
+(indices into the corpus' own sorted intent list in ``meta.json``). The
+directory name carries a hash of the source file and the tokenizer, so an
+unchanged JSONL is tokenized once and later runs only memory-map it.
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 1
+TOKENS_FILE = "tokens.bin"
+OFFSETS_FILE = "offsets.npy"
+LABELS_FILE = "labels.npy"
+META_FILE = "meta.json"
+
+def _file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """Hash of everything that changes the ids a tokenizer produces (vocab, normalizer, special tokens)."""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        state = json.loads(backend.to_str())
+        # Truncation/padding settings are per-call state, not part of the vocabulary
+        state.pop("truncation", None)
+        state.pop("padding", None)
+        state = json.dumps(state, sort_keys=True)
+    else:
+        state = json.dumps(
+            [type(tokenizer).__name__, tokenizer.get_vocab(), getattr(tokenizer, "init_kwargs", {})],
+            sort_keys=True, default=str,
+        )
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
+
+def corpus_key(source: str, tokenizer, max_length: int) -> str:
+    key = f"{FORMAT_VERSION}:{_file_digest(Path(source))}:{tokenizer_fingerprint(tokenizer)}:{max_length}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+class TokenizedCorpus:
+    """Read-only view of a pre-tokenized corpus, usable directly as a Trainer dataset.
+
+    Items are unpadded ``{"input_ids", "attention_mask", "labels"}`` dicts for
+    a padding collator. Call ``set_label_map`` to translate the corpus' intent
+    names into a model's label ids.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / META_FILE, "r") as f:
+            self.meta = json.load(f)
+        self.intents: List[str] = self.meta["intents"]
+
+        n_tokens = self.meta["n_tokens"]
+        self.tokens = (
+            np.memmap(self.path / TOKENS_FILE, dtype=np.int32, mode="r", shape=(n_tokens,))
+            if n_tokens else np.empty(0, dtype=np.int32)
+        )
+        self.offsets = np.load(self.path / OFFSETS_FILE, mmap_mode="r")
+        self.labels = np.load(self.path / LABELS_FILE, mmap_mode="r")
+        self._label_lookup: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def __getitem__(self, i: int) -> Dict:
+        ids = self.tokens[self.offsets[i]:self.offsets[i + 1]].tolist()
+        label = int(self.labels[i])
+        if self._label_lookup is not None:
+            label = int(self._label_lookup[label])
+        return {"input_ids": ids, "attention_mask": [1] * len(ids), "labels": label}
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def set_label_map(self, intent_to_id: Dict[str, int]):
+        self._label_lookup = np.array([intent_to_id[intent] for intent in self.intents], dtype=np.int64)
+        return self
+
+    # ---------- building ----------
+    @classmethod
+    def build(cls, source: str, tokenizer, output_dir: str, max_length: int = 128, chunk_size: int = 10000):
+        """Stream ``source`` (JSONL with text/intent) through the tokenizer in chunks into ``output_dir``."""
+        output_dir = Path(output_dir)
+        tmp_dir = output_dir.with_name(output_dir.name + f".tmp{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        offsets, first_seen, intent_index = [0], [], {}
+        n_tokens = 0
+
+        def flush(texts, intents, out):
+            nonlocal n_tokens
+            ids = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+            for row in ids:
+                n_tokens += len(row)
+                offsets.append(n_tokens)
+            out.write(np.concatenate([np.asarray(row, dtype=np.int32) for row in ids]).tobytes())
+            for intent in intents:
+                first_seen.append(intent_index.setdefault(intent, len(intent_index)))
+
+        with open(source, "r") as f, open(tmp_dir / TOKENS_FILE, "wb") as out:
+            texts, intents = [], []
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                texts.append(record.get("text", ""))
+                intents.append(record["intent"])
+                if len(texts) >= chunk_size:
+                    flush(texts, intents, out)
+                    texts, intents = [], []
+            if texts:
+                flush(texts, intents, out)
+
+        # Store labels against the sorted intent list so the mapping is stable across rebuilds
+        intents_sorted = sorted(intent_index)
+        remap = np.array([intents_sorted.index(name) for name in intent_index], dtype=np.int32)
+        labels = remap[np.asarray(first_seen, dtype=np.int64)] if first_seen else np.empty(0, dtype=np.int32)
+
+        np.save(tmp_dir / OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+        np.save(tmp_dir / LABELS_FILE, labels.astype(np.int32))
+        with open(tmp_dir / META_FILE, "w") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "source": str(source),
+                "max_length": max_length,
+                "n_examples": len(labels),
+                "n_tokens": n_tokens,
+                "intents": intents_sorted,
+            }, f, indent=2)
+
+        # Publish atomically so an interrupted build is never mistaken for a cached corpus
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.replace(tmp_dir, output_dir)
+        return cls(output_dir)
+
+    @classmethod
+    def load_or_build(cls, source: str, tokenizer, cache_dir: str = "data/cache/tokenized", max_length: int = 128):
+        """Memory-map the cached corpus for this (file, tokenizer, max_length), tokenizing only on a miss."""
+        stem = Path(source).stem
+        key = corpus_key(source, tokenizer, max_length)
+        path = Path(cache_dir) / f"{stem}-{key}"
+        if (path / META_FILE).exists():
+            corpus = cls(path)
+            print(f"✓ Reusing tokenized {stem} ({len(corpus)} examples, {path})")
+            return corpus
+
+        print(f"Tokenizing {source}...")
+        corpus = cls.build(source, tokenizer, path, max_length=max_length)
+        # Older versions of the same file can't be hit again
+        for stale in Path(cache_dir).glob(f"{stem}-*"):
+            if stale != path and (stale / META_FILE).exists():
+                shutil.rmtree(stale, ignore_errors=True)
+        print(f"✓ Tokenized {len(corpus)} examples ({corpus.meta['n_tokens']} tokens) to {path}")
+        return corpus
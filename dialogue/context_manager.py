@@ -1,6 +1,7 @@
 """Multi-turn dialogue context management."""
 from typing import Dict, List, Optional
-from datetime import datetime
+
+from .history import TurnHistory
 
 class ContextManager:
     """Manage conversation context across turns."""
@@ -9,7 +10,7 @@ class ContextManager:
         self.session_id = session_id
         self.max_turns = max_turns
         self.context = {
-            "history": [],
+            "history": TurnHistory(max_turns),
             "slots": {},
             "state": "idle",
             "intent": None,
@@ -17,21 +18,12 @@ class ContextManager:
         }
 
     def add_turn(self, role: str, message: str, metadata: Dict = None):
-        """Add conversation turn."""
-        turn = {
-            "role": role,
-            "message": message,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": metadata or {},
-        }
-        self.context["history"].append(turn)
-        if len(self.context["history"]) > self.max_turns:
-            self.context["history"] = self.context["history"][-self.max_turns:]
+        """Add conversation turn; beyond ``max_turns`` the oldest is overwritten."""
+        self.context["history"].append(role, message, metadata)
 
     def get_history(self, max_turns: int = 5) -> str:
         """Get formatted conversation history."""
-        recent = self.context["history"][-max_turns:]
-        return "\n".join([f"{t['role']}: {t['message']}" for t in recent])
+        return self.context["history"].render(max_turns)
 
     def update_slots(self, slots: Dict):
         """Update dialogue slots."""
@@ -0,0 +1,92 @@
+"""Fixed-capacity conversation history."""
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Canonical role strings, so every turn of every session points at the same objects
+ROLES = {role: sys.intern(role) for role in ("user", "bot", "system")}
+
+class Turn:
+    """One message. Iterates as ``(role, message)`` so existing tuple unpacking keeps working."""
+
+    __slots__ = ("role", "message", "timestamp", "metadata")
+
+    def __init__(self, role: str, message: str, timestamp: Optional[int] = None, metadata: Optional[Dict] = None):
+        self.role = ROLES.get(role) or sys.intern(role)
+        self.message = message
+        self.timestamp = int(time.time()) if timestamp is None else timestamp  # epoch seconds
+        self.metadata = metadata or None  # no empty dict per turn
+
+    def __iter__(self):
+        yield self.role
+        yield self.message
+
+    def __repr__(self) -> str:
+        return f"Turn({self.role!r}, {self.message!r}, {self.timestamp})"
+
+    def to_dict(self) -> Dict:
+        return {"role": self.role, "message": self.message, "timestamp": self.timestamp, "metadata": self.metadata or {}}
+
+
+class TurnHistory:
+    """Ring buffer holding the last ``capacity`` turns.
+
+    The backing list grows to ``capacity`` and is then overwritten in place,
+    so append and eviction are O(1) and nothing is ever copied. Iteration
+    and ``render`` walk the ring oldest to newest without materializing it.
+    """
+
+    __slots__ = ("capacity", "_turns", "_head")
+
+    def __init__(self, capacity: int = 20):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._turns: List[Turn] = []
+        self._head = 0  # index of the oldest turn once the buffer is full
+
+    def append(self, role: str, message: str, metadata: Optional[Dict] = None) -> Turn:
+        turn = Turn(role, message, metadata=metadata)
+        if len(self._turns) < self.capacity:
+            self._turns.append(turn)
+        else:
+            self._turns[self._head] = turn
+            self._head = (self._head + 1) % self.capacity
+        return turn
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        n = len(self._turns)
+        for i in range(n):
+            yield self._turns[(self._head + i) % n]
+
+    def recent(self, max_turns: int) -> Iterator[Turn]:
+        """The last ``max_turns`` turns, oldest first."""
+        n = len(self._turns)
+        for i in range(max(0, n - max_turns), n):
+            yield self._turns[(self._head + i) % n]
+
+    def __getitem__(self, index: int) -> Turn:
+        n = len(self._turns)
+        if not -n <= index < n:
+            raise IndexError("turn index out of range")
+        return self._turns[(self._head + index % n) % n]
+
+    def render(self, max_turns: int = 5) -> str:
+        """``role: message`` lines for the last ``max_turns`` turns."""
+        return "\n".join(f"{turn.role}: {turn.message}" for turn in self.recent(max_turns))
+
+    def clear(self):
+        self._turns = []
+        self._head = 0
+
+    def estimate_bytes(self) -> int:
+        """Approximate memory of the buffer, its turns and their message text (roles are shared)."""
+        size = sys.getsizeof(self) + sys.getsizeof(self._turns)
+        for turn in self._turns:
+            size += sys.getsizeof(turn) + sys.getsizeof(turn.message) + sys.getsizeof(turn.timestamp)
+            if turn.metadata:
+                size += sys.getsizeof(turn.metadata)
+        return size
@@ -0,0 +1,210 @@
+"""Bounded in-memory store of dialogue sessions."""
+import itertools
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Dict, List, Optional
+
+# Rough fixed cost of a DialogueContext (object, slots dict, datetime) excluding its history
+_CONTEXT_OVERHEAD_BYTES = 1000
+
+def estimate_context_bytes(context) -> int:
+    """Approximate memory held by one DialogueContext (history text and slots dominate)."""
+    size = _CONTEXT_OVERHEAD_BYTES + context.history.estimate_bytes()
+    for name, value in context.slots.items():
+        size += sys.getsizeof(name) + sys.getsizeof(str(value))
+    return size
+
+
+class SessionStore:
+    """DialogueContexts by session id, bounded by idle TTL, session count and memory.
+
+    Entries are kept in least-recently-used order. ``get`` drops a session
+    idle for longer than ``ttl_seconds``; ``put`` evicts the least recently
+    used sessions while there are more than ``max_sessions`` or their
+    estimated size exceeds ``max_memory_mb``. ``start()`` runs a background
+    task that expires idle sessions in small slices, yielding to the event
+    loop between them. Thread-safe.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 100000,
+        ttl_seconds: Optional[float] = 1800.0,
+        max_memory_mb: Optional[float] = None,
+        expiry_interval_seconds: float = 30.0,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self.expiry_interval_seconds = expiry_interval_seconds
+
+        # session_id -> (context, last_access, estimated bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = Lock()
+        self._task = None  # asyncio.Task of the background expiry loop
+
+        self.created = 0
+        self.evictions = {"expired": 0, "lru": 0, "memory": 0}
+
+    # ---------- access ----------
+    def get(self, session_id: str):
+        """The session's context, or None if unknown or idle past the TTL."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            context, last_access, size = entry
+            now = time.monotonic()
+            if self._is_expired(last_access, now):
+                self._remove(session_id, "expired")
+                return None
+            self._entries[session_id] = (context, now, size)
+            self._entries.move_to_end(session_id)
+            return context
+
+    def put(self, session_id: str, context):
+        """Insert or refresh a session (re-estimating its size), then enforce the limits."""
+        size = estimate_context_bytes(context)
+        with self._lock:
+            previous = self._entries.get(session_id)
+            if previous is None:
+                self.created += 1
+            else:
+                self._memory_bytes -= previous[2]
+            self._entries[session_id] = (context, time.monotonic(), size)
+            self._entries.move_to_end(session_id)
+            self._memory_bytes += size
+
+            while len(self._entries) > self.max_sessions:
+                self._remove(next(iter(self._entries)), "lru")
+            # Never evict the session just written, even if it alone is over budget
+            while self.max_memory_bytes and self._memory_bytes > self.max_memory_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)), "memory")
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            if session_id not in self._entries:
+                return False
+            _, _, size = self._entries.pop(session_id)
+            self._memory_bytes -= size
+            return True
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def page(self, offset: int = 0, limit: int = 100) -> List[Dict]:
+        """Sessions from least to most recently active, ``limit`` at a time."""
+        now = time.monotonic()
+        with self._lock:
+            entries = list(itertools.islice(self._entries.items(), offset, offset + limit))
+        return [
+            {
+                "session_id": session_id,
+                "state": context.state,
+                "turns": len(context.history),
+                "idle_seconds": round(now - last_access, 1),
+            }
+            for session_id, (context, last_access, _) in entries
+        ]
+
+    # ---------- expiry ----------
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - last_access > self.ttl_seconds
+
+    def _remove(self, session_id: str, reason: str):
+        _, _, size = self._entries.pop(session_id)
+        self._memory_bytes -= size
+        self.evictions[reason] += 1
+
+    def expire(self, max_items: Optional[int] = None) -> int:
+        """Drop sessions idle past the TTL, oldest first; stops after ``max_items``. Returns the count."""
+        if self.ttl_seconds is None:
+            return 0
+        removed = 0
+        now = time.monotonic()
+        with self._lock:
+            # LRU order: the first non-expired entry ends the scan
+            while self._entries and (max_items is None or removed < max_items):
+                session_id, (_, last_access, _) = next(iter(self._entries.items()))
+                if not self._is_expired(last_access, now):
+                    break
+                self._remove(session_id, "expired")
+                removed += 1
+        return removed
+
+    async def start(self):
+        """Start background expiry on the running event loop."""
+        import asyncio  # only needed once serving; keeps this module cheap to import
+
+        if self._task is None and self.ttl_seconds is not None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        import asyncio
+
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        import asyncio
+
+        while True:
+            await asyncio.sleep(self.expiry_interval_seconds)
+            # Short critical sections so request handlers never wait long on the lock
+            while self.expire(max_items=1000) == 1000:
+                await asyncio.sleep(0)
+
+    def get_summary(self) -> Dict:
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "memory_mb": round(self._memory_bytes / (1024 * 1024), 2),
+            "max_memory_mb": round(self.max_memory_bytes / (1024 * 1024), 2) if self.max_memory_bytes else None,
+            "ttl_seconds": self.ttl_seconds,
+            "created": self.created,
+            "evictions": dict(self.evictions),
+        }
+
+
+class SessionLocks:
+    """Per-session asyncio locks so turns of one session never overlap.
+
+    A lock exists only while some request holds or waits for it, so the
+    registry stays as small as the number of in-flight sessions. Use from
+    the event loop thread only.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, list] = {}  # session_id -> [asyncio.Lock, holders + waiters]
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        import asyncio
+
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -1,9 +1,16 @@
 """Dialogue state machine for multi-turn conversations."""
+import os
+import time
 from enum import Enum
-from typing import Optional, Dict, List
+from typing import Iterable, Optional, Dict, List, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from nlu.validators import EntityValidator
+
+from .history import TurnHistory
+from .session_store import SessionLocks, SessionStore
+
 @dataclass
 class DialogueContext:
     """Conversation state across turns."""
@@ -11,19 +18,20 @@ class DialogueContext:
     user_id: Optional[str] = None
     state: str = "idle"
     slots: Dict = field(default_factory=dict)
-    history: List = field(default_factory=list)
+    active_intent: Optional[str] = None  # intent whose slots are being filled
+    pending_slot: Optional[str] = None  # slot the bot just asked for
+    history: TurnHistory = field(default_factory=TurnHistory)
     confidence_threshold: float = 0.6
     fallback_count: int = 0
     created_at: datetime = field(default_factory=datetime.now)
 
     def add_turn(self, role: str, message: str):
         """Add conversation turn."""
-        self.history.append((role, message))
+        self.history.append(role, message)
 
     def get_context(self, max_turns: int = 5) -> str:
         """Get recent conversation context."""
-        recent = self.history[-max_turns:]
-        return "\n".join([f"{role}: {msg}" for role, msg in recent])
+        return self.history.render(max_turns)
 
 class DialoguePolicy:
     """Action selection policy."""
@@ -43,6 +51,9 @@ class DialoguePolicy:
             "disputed_transaction"
         ]
 
+    def required_slots(self, intent: Optional[str]) -> List[str]:
+        return self.intent_slot_mapping.get(intent, [])
+
     def select_action(self, intent: str, confidence: float, context: DialogueContext) -> Dict:
         """Select next action based on context."""
 
@@ -81,45 +92,298 @@ class DialoguePolicy:
             "response": "Processing your request..."
         }
 
+def _slot_text(value) -> str:
+    """Human-readable slot value: "credit card", "$1,000.00", "2024-01-01 to 2024-01-31"."""
+    if isinstance(value, dict):
+        if "amount" in value:
+            currency = value.get("currency", "USD")
+            return f"${value['amount']:,.2f}" if currency == "USD" else f"{value['amount']:,.2f} {currency}"
+        if "start" in value and "end" in value:
+            return f"{str(value['start'])[:10]} to {str(value['end'])[:10]}"
+    return str(value).replace("_", " ")
+
+def _timed(fn, *args):
+    """``(fn(*args), elapsed milliseconds)``."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
 class DialogueManager:
     """Main dialogue orchestrator."""
 
-    def __init__(self, intent_classifier, ner_extractor=None, backend_adapter=None):
+    FALLBACK_INTENT = ("general_inquiry", 0.3)
+    # Longest slot-filling reply still taken as just the requested value
+    SLOT_REPLY_MAX_WORDS = 6
+    # Words a slot reply may carry around the value ("my savings account please")
+    SLOT_REPLY_FILLER = {
+        "a", "an", "the", "my", "it", "it's", "its", "is", "that", "this", "one",
+        "please", "ok", "okay", "sure", "yes", "yeah", "just", "um", "uh",
+    }
+    SLOT_FILLER = {
+        "account_type": {"account", "accounts"},
+        "source_account": {"from", "account", "accounts"},
+        "target_account": {"to", "into", "account", "accounts"},
+        "amount": {"dollars", "dollar", "bucks"},
+        "date_range": {"for", "from", "over", "during"},
+        "card_last4": {"card", "ending", "ends", "in", "with", "last", "four", "digits", "number"},
+    }
+
+    def __init__(
+        self,
+        intent_classifier,
+        ner_extractor=None,
+        backend_adapter=None,
+        intent_scheduler=None,
+        tokenizer=None,
+        faq_retriever=None,
+        faq_min_score: Optional[float] = None,  # None = the retriever's calibrated min_score
+        faq_intents: Iterable[str] = (),  # informational intents answered from the FAQ index
+        session_store: Optional[SessionStore] = None,
+        max_turns: int = 20,
+        max_workers: int = 0,  # threads for process_message_async; 0 = two per CPU (intent and NER of a turn overlap)
+    ):
         self.intent_classifier = intent_classifier
         self.ner_extractor = ner_extractor
         self.backend_adapter = backend_adapter
+        self.intent_scheduler = intent_scheduler
+        self.tokenizer = tokenizer  # BankingTokenizer: one pass shared by intent and NER
+        self.faq_retriever = faq_retriever  # answers the informational intents in faq_intents
+        self.faq_min_score = faq_min_score if faq_min_score is not None else getattr(faq_retriever, "min_score", None)
+        self.faq_intents = frozenset(faq_intents)
         self.policy = DialoguePolicy()
-        self.sessions: Dict[str, DialogueContext] = {}
+        self.sessions = session_store if session_store is not None else SessionStore()
+        self.max_turns = max_turns  # history kept per session; older turns are overwritten
+        self.max_workers = max_workers or 2 * (os.cpu_count() or 1)
+        self.session_locks = SessionLocks()
+        self._executor = None  # created on the first async turn
+        rules = getattr(ner_extractor, "rules", None)
+        product_types = rules.product_types if rules else None
+        account = lambda text: EntityValidator.parse_account_type(text, product_types, full_match=True)
+        # Each parser accepts only text that is the value and nothing else
+        self.slot_parsers = {
+            "account_type": account,
+            "source_account": account,
+            "target_account": account,
+            "amount": lambda text: EntityValidator.parse_amount(text, full_match=True),
+            "date_range": lambda text: EntityValidator.parse_date_range(text, full_match=True),
+            "card_last4": lambda text: EntityValidator.validate_card_last4(text, full_match=True),
+        }
 
     def process_message(self, session_id: str, user_message: str) -> Dict:
         """Process user message and return response."""
 
-        if session_id not in self.sessions:
-            self.sessions[session_id] = DialogueContext(session_id=session_id, state="greeting")
+        started = time.perf_counter()
+        timings = {}
+        context = self._start_turn(session_id, user_message)
+        slot_reply = self._parse_slot_reply(context, user_message)
+        if slot_reply:
+            tokens, timings["tokenize_ms"] = None, 0.0
+            (intent, confidence), timings["intent_ms"] = (context.active_intent, 1.0), 0.0
+        else:
+            tokens, timings["tokenize_ms"] = _timed(self._tokenize, user_message, bool(self._entity_types(context)))
+            (intent, confidence), timings["intent_ms"] = _timed(self._predict_intent, user_message, tokens)
+        entities, timings["ner_ms"] = _timed(
+            self._extract_entities, user_message, tokens, self._entity_types(context, intent)
+        )
+        entities = slot_reply + entities
+
+        return self._complete_turn(context, user_message, intent, confidence, entities, timings, started)
+
+    async def process_message_async(self, session_id: str, user_message: str) -> Dict:
+        """Process a message without blocking the event loop.
+
+        Tokenization, inference, NER and the backend call run on a bounded
+        thread pool. A slot-filling reply that parses as the requested value
+        skips tokenization and the classifier. NER only looks for the slots
+        the turn can use: mid slot filling those are known before
+        classification, so entity extraction runs concurrently with intent
+        prediction (through the batch scheduler if one is set); otherwise it
+        waits for the predicted intent and is skipped for intents without
+        slots. Turns of the same session are serialized by a per-session
+        lock, different sessions run in parallel.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
 
-        context = self.sessions[session_id]
+        async with self.session_locks.hold(session_id):
+            started = time.perf_counter()
+            timings = {}
+            context = self._start_turn(session_id, user_message)
+            expected = self._entity_types(context)
+            slot_reply = self._parse_slot_reply(context, user_message)
+            if slot_reply:
+                tokens, timings["tokenize_ms"] = None, 0.0
+                (intent, confidence), timings["intent_ms"] = (context.active_intent, 1.0), 0.0
+                entities, timings["ner_ms"] = await loop.run_in_executor(
+                    executor, _timed, self._extract_entities, user_message, tokens, expected
+                )
+            else:
+                tokens, timings["tokenize_ms"] = await loop.run_in_executor(
+                    executor, _timed, self._tokenize, user_message, bool(expected)
+                )
+                if expected:
+                    ((intent, confidence), timings["intent_ms"]), (entities, timings["ner_ms"]) = await asyncio.gather(
+                        self._predict_intent_async(user_message, tokens, executor),
+                        loop.run_in_executor(executor, _timed, self._extract_entities, user_message, tokens, expected),
+                    )
+                else:
+                    (intent, confidence), timings["intent_ms"] = await self._predict_intent_async(user_message, tokens, executor)
+                    entities, timings["ner_ms"] = [], 0.0
+
+            # The predicted intent may need slots beyond the ones looked for up front
+            remaining = self._entity_types(context, intent) - expected
+            if remaining:
+                more, ms = await loop.run_in_executor(
+                    executor, _timed, self._extract_entities, user_message, tokens, remaining
+                )
+                entities += more
+                timings["ner_ms"] += ms
+            entities = slot_reply + entities
+
+            return await loop.run_in_executor(
+                executor, self._complete_turn, context, user_message, intent, confidence, entities, timings, started
+            )
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dialogue")
+        return self._executor
+
+    def close(self):
+        """Shut down the thread pool used by process_message_async."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _start_turn(self, session_id: str, user_message: str) -> DialogueContext:
+        context = self.sessions.get(session_id)
+        if context is None:
+            context = DialogueContext(session_id=session_id, state="greeting", history=TurnHistory(self.max_turns))
         context.add_turn("user", user_message)
+        return context
 
+    def _tokenize(self, user_message: str, ner_expected: bool = True) -> Optional[Dict]:
+        """Tokenize once for both intent classification and NER (None without a tokenizer).
+
+        spaCy is skipped when the NER extractor has its rule fast path; it then
+        parses only the messages its rules can't fully resolve. It is also
+        skipped when NER isn't expected this turn: should the predicted
+        intent need slots after all, the extractor parses the message itself.
+        """
+        if self.tokenizer is None:
+            return None
+        parse = ner_expected and self.ner_extractor is not None and not getattr(self.ner_extractor, "use_rules", False)
         try:
-            intent, confidence = self.intent_classifier.predict(user_message)
+            return self.tokenizer.tokenize(user_message, parse=parse)
+        except Exception as e:
+            print(f"Tokenization error: {e}")
+            return None
+
+    def _predict_intent(self, user_message: str, tokens: Optional[Dict]) -> Tuple[str, float]:
+        try:
+            if tokens:
+                return self.intent_classifier.predict(user_message, encoding=tokens["encoding"])
+            return self.intent_classifier.predict(user_message)
         except Exception as e:
             print(f"Intent classification error: {e}")
-            intent = "general_inquiry"
-            confidence = 0.3
+            return self.FALLBACK_INTENT
 
-        if self.ner_extractor:
-            try:
-                entities = self.ner_extractor.extract_entities(user_message)
-                for entity in entities:
-                    entity_type = entity.get("type", "").lower()
-                    if entity_type:
-                        context.slots[entity_type] = entity.get("text", "")
-            except Exception as e:
-                print(f"NER extraction error: {e}")
+    async def _predict_intent_async(self, user_message: str, tokens: Optional[Dict], executor):
+        """``((intent, confidence), ms)`` from the batch scheduler, or from the classifier on ``executor``."""
+        import asyncio
+
+        if self.intent_scheduler is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, _timed, self._predict_intent, user_message, tokens
+            )
+        start = time.perf_counter()
+        try:
+            encoding = tokens["encoding"] if tokens else None
+            prediction = await self.intent_scheduler.predict(user_message, encoding=encoding)
+        except Exception as e:
+            print(f"Intent classification error: {e}")
+            prediction = self.FALLBACK_INTENT
+        return prediction, (time.perf_counter() - start) * 1000
+
+    def _parse_slot_reply(self, context: DialogueContext, user_message: str) -> List[Dict]:
+        """The pending slot as a one-entity list if the reply is just its value, else [].
+
+        Mid slot filling, a short reply like "savings" or "$500" is almost
+        always the value asked for, and the classifier tends to misread it.
+        The bypass only applies when, once filler words are dropped, the
+        whole reply parses as the value; anything else ("no, show my last 3
+        transactions") goes to the classifier. Entities NER finds in the
+        same reply are applied after this one.
+        """
+        slot = context.pending_slot
+        if context.state != "slot_filling" or not context.active_intent or not slot:
+            return []
+        parser = self.slot_parsers.get(slot)
+        words = user_message.split()
+        if parser is None or len(words) > self.SLOT_REPLY_MAX_WORDS:
+            return []
+
+        filler = self.SLOT_REPLY_FILLER | self.SLOT_FILLER.get(slot, set())
+        # Punctuation is only stripped around words, so "$1,000" and "2024-01-01" stay intact
+        core = [w for w in (word.strip(".,!?;:\"'").lower() for word in words) if w and w not in filler]
+        if not core:
+            return []
+        value = parser(" ".join(core))
+        if value is None:
+            return []
+        return [{"text": user_message, "type": slot, "value": value}]
+
+    def _entity_types(self, context: DialogueContext, intent: Optional[str] = None) -> Set[str]:
+        """Slot types worth extracting: the predicted intent's and, mid slot filling, the active intent's."""
+        types = set(self.policy.required_slots(intent))
+        if context.state == "slot_filling":
+            types.update(self.policy.required_slots(context.active_intent))
+        return types
+
+    def _extract_entities(self, user_message: str, tokens: Optional[Dict], types: Set[str]) -> List[Dict]:
+        """Entities of ``types`` in the message; reads no session state, so it can run alongside intent prediction."""
+        if not self.ner_extractor or not types:
+            return []
+        try:
+            doc = tokens["doc"] if tokens else None
+            return self.ner_extractor.extract_entities(user_message, doc=doc, types=types)
+        except Exception as e:
+            print(f"NER extraction error: {e}")
+            return []
+
+    def _complete_turn(
+        self,
+        context: DialogueContext,
+        user_message: str,
+        intent: str,
+        confidence: float,
+        entities: List[Dict],
+        timings: Dict,
+        started: float,
+    ) -> Dict:
+        """Fill slots, then run policy and backend for a classified message."""
+
+        for entity in entities:
+            entity_type = entity.get("type", "").lower()
+            if entity_type:
+                context.slots[entity_type] = entity.get("value", entity.get("text", ""))
 
         action_spec = self.policy.select_action(intent, confidence, context)
         response = action_spec["response"]
         context.state = action_spec["next_state"]
+        filling = action_spec["action"] == "fill_slot"
+        context.active_intent = intent if filling else None
+        context.pending_slot = action_spec["params"]["slot"] if filling else None
+
+        if action_spec["action"] == "query_backend" and self._is_informational(intent):
+            answer = self._answer_from_faq(user_message)
+            if answer:
+                action_spec = {"action": "answer_faq", "params": {"intent": intent}}
+                response = answer
+                context.state = "completion"
 
         if action_spec["action"] == "query_backend" and self.backend_adapter:
             try:
@@ -131,23 +395,42 @@ class DialogueManager:
                 response = "I encountered an issue processing your request."
 
         context.add_turn("bot", response)
+        # Stored (and size re-estimated) once the turn is complete; may evict idle sessions
+        self.sessions.put(context.session_id, context)
 
         return {
-            "session_id": session_id,
+            "session_id": context.session_id,
             "response": response,
             "intent": intent,
             "confidence": confidence,
             "state": context.state,
             "slots": context.slots,
-            "action": action_spec["action"]
+            "action": action_spec["action"],
+            "timings": dict(timings, total_ms=(time.perf_counter() - started) * 1000),
         }
 
+    def _is_informational(self, intent: str) -> bool:
+        """Intents listed in ``faq_intents``; only these can be answered from the FAQ index."""
+        if self.faq_retriever is None or self.faq_min_score is None:
+            return False
+        return intent in self.faq_intents
+
+    def _answer_from_faq(self, user_message: str) -> Optional[str]:
+        try:
+            hits = self.faq_retriever.retrieve(user_message, top_k=1)
+        except Exception as e:
+            print(f"FAQ retrieval error: {e}")
+            return None
+        if hits and hits[0]["score"] >= self.faq_min_score:
+            return hits[0]["a"]
+        return None
+
     def _format_response(self, intent: str, data: dict, context: DialogueContext) -> str:
         """Format backend data into response."""
 
         if intent == "get_balance":
             balance = data.get("balance", "N/A")
-            account = context.slots.get("account_type", "Your")
+            account = _slot_text(context.slots.get("account_type", "your"))
             return f"{account.capitalize()} account balance: ${balance}"
 
         elif intent == "transaction_history":
@@ -159,6 +442,8 @@ class DialogueManager:
                 f"- {t.get('date', 'N/A')}: {t.get('merchant', 'Unknown')} - ${t.get('amount', '0')}"
                 for t in transactions[:5]
             ])
-            return f"Recent transactions:\n{summary}"
+            period = context.slots.get("date_range")
+            header = f"Transactions for {_slot_text(period)}" if period else "Recent transactions"
+            return f"{header}:\n{summary}"
 
         return "I've processed your request."
\ No newline at end of file
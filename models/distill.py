@@ -0,0 +1,182 @@
+"""Knowledge distillation of the intent classifier into a smaller student."""
+import copy
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data_src.data_augmentation import DataAugmentation
+from nlu.inference import pad_batch
+from nlu.intent_classifier import IntentClassifier
+
+def build_student(teacher, n_layers: int = 2):
+    """Shallow copy of a DistilBERT teacher: same width and vocab, fewer layers.
+
+    The student starts from the teacher's embeddings, evenly spaced transformer
+    layers and classification head, which converges much faster than random init.
+    """
+    from transformers import AutoModelForSequenceClassification
+
+    if not hasattr(teacher, "distilbert"):
+        raise ValueError(f"Distillation expects a DistilBERT teacher, got {type(teacher).__name__}")
+
+    teacher_layers = teacher.distilbert.transformer.layer
+    config = copy.deepcopy(teacher.config)
+    config.n_layers = n_layers
+    student = AutoModelForSequenceClassification.from_config(config)
+
+    student.distilbert.embeddings.load_state_dict(teacher.distilbert.embeddings.state_dict())
+    for student_idx, teacher_idx in enumerate(np.linspace(0, len(teacher_layers) - 1, n_layers).round().astype(int)):
+        student.distilbert.transformer.layer[student_idx].load_state_dict(teacher_layers[teacher_idx].state_dict())
+    student.pre_classifier.load_state_dict(teacher.pre_classifier.state_dict())
+    student.classifier.load_state_dict(teacher.classifier.state_dict())
+    return student
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature: float = 2.0, alpha: float = 0.5):
+    """alpha * T² * KL(student_T || teacher_T) + (1 - alpha) * CE(student, labels)."""
+    soft = F.kl_div(
+        F.log_softmax(student_logits / temperature, dim=-1),
+        F.softmax(teacher_logits / temperature, dim=-1),
+        reduction="batchmean",
+    ) * temperature ** 2
+    hard = F.cross_entropy(student_logits, labels)
+    return alpha * soft + (1 - alpha) * hard
+
+def _teacher_logits(teacher, features: Dict[str, List], pad_token_id: int, batch_size: int) -> np.ndarray:
+    """Soft targets for every example, computed once in length-sorted batches."""
+    lengths = [len(ids) for ids in features["input_ids"]]
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    logits = np.zeros((len(lengths), teacher.config.num_labels), dtype=np.float32)
+
+    teacher.eval()
+    with torch.no_grad():
+        for i in range(0, len(order), batch_size):
+            indices = order[i:i + batch_size]
+            batch = {key: [features[key][j] for j in indices] for key in ("input_ids", "attention_mask")}
+            inputs = {k: torch.from_numpy(v) for k, v in pad_batch(batch, pad_token_id).items()}
+            logits[indices] = teacher(**inputs).logits.numpy()
+    return logits
+
+def _augment(records: List[Dict], num_augmented: int) -> List[Dict]:
+    augmenter = DataAugmentation()
+    augmented = augmenter.augment_batch(records, num_augmented=num_augmented, strategy="paraphrase")
+    typos = augmenter.augment_batch(records, num_augmented=1, strategy="typo")
+    return augmented + typos[len(records):]
+
+def _accuracy(model, features: Dict[str, List], labels: np.ndarray, pad_token_id: int, batch_size: int) -> float:
+    model.eval()
+    correct = 0
+    with torch.no_grad():
+        for i in range(0, len(labels), batch_size):
+            batch = {key: features[key][i:i + batch_size] for key in ("input_ids", "attention_mask")}
+            inputs = {k: torch.from_numpy(v) for k, v in pad_batch(batch, pad_token_id).items()}
+            preds = model(**inputs).logits.argmax(dim=-1).numpy()
+            correct += int((preds == labels[i:i + batch_size]).sum())
+    return correct / max(len(labels), 1)
+
+def distill_intent_model(
+    teacher_dir: str,
+    train_filepath: str,
+    output_dir: str = "models/distilled_intent",
+    val_filepath: Optional[str] = None,
+    n_layers: int = 2,
+    temperature: float = 2.0,
+    alpha: float = 0.5,
+    epochs: int = 5,
+    batch_size: int = 32,
+    learning_rate: float = 5e-5,
+    num_augmented: int = 2,
+    max_length: int = 128,
+    seed: int = 42,
+) -> Dict:
+    """Train a shallow student on the teacher's soft labels over synthetic + augmented data.
+
+    The student is saved in the same layout as IntentClassifier.train (weights,
+    tokenizer, intent_mapping.json), so IntentClassifier.load_model can serve it.
+    """
+    from transformers import get_linear_schedule_with_warmup
+
+    random.seed(seed)
+    torch.manual_seed(seed)
+
+    teacher = IntentClassifier(device="cpu")
+    teacher.load_model(teacher_dir)
+    tokenizer = teacher.tokenizer
+
+    records = [r for r in teacher.load_data(train_filepath) if r["intent"] in teacher.intent_to_id]
+    records = _augment(records, num_augmented)
+    print(f"Distillation examples (with augmentation): {len(records)}")
+
+    features = tokenizer([r["text"] for r in records], truncation=True, max_length=max_length)
+    labels = np.array([teacher.intent_to_id[r["intent"]] for r in records], dtype=np.int64)
+
+    print("Computing teacher soft labels...")
+    soft_targets = _teacher_logits(teacher.model, features, tokenizer.pad_token_id, batch_size)
+
+    student = build_student(teacher.model, n_layers=n_layers)
+    student.train()
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate, weight_decay=0.01)
+    steps_per_epoch = (len(records) + batch_size - 1) // batch_size
+    scheduler = get_linear_schedule_with_warmup(optimizer, int(0.1 * steps_per_epoch * epochs), steps_per_epoch * epochs)
+
+    print(f"Training {n_layers}-layer student for {epochs} epochs...")
+    indices = list(range(len(records)))
+    for epoch in range(epochs):
+        random.shuffle(indices)
+        student.train()
+        total_loss = 0.0
+
+        for i in range(0, len(indices), batch_size):
+            batch_idx = indices[i:i + batch_size]
+            batch = {key: [features[key][j] for j in batch_idx] for key in ("input_ids", "attention_mask")}
+            inputs = {k: torch.from_numpy(v) for k, v in pad_batch(batch, tokenizer.pad_token_id).items()}
+
+            loss = distillation_loss(
+                student(**inputs).logits,
+                torch.from_numpy(soft_targets[batch_idx]),
+                torch.from_numpy(labels[batch_idx]),
+                temperature=temperature,
+                alpha=alpha,
+            )
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            total_loss += loss.item() * len(batch_idx)
+
+        print(f"  epoch {epoch + 1}/{epochs}: loss {total_loss / len(records):.4f}")
+
+    report = {
+        "n_layers": n_layers,
+        "teacher_params": sum(p.numel() for p in teacher.model.parameters()),
+        "student_params": sum(p.numel() for p in student.parameters()),
+    }
+
+    if val_filepath:
+        val = [r for r in teacher.load_data(val_filepath) if r["intent"] in teacher.intent_to_id]
+        val_features = tokenizer([r["text"] for r in val], truncation=True, max_length=max_length)
+        val_labels = np.array([teacher.intent_to_id[r["intent"]] for r in val], dtype=np.int64)
+        report["teacher_val_accuracy"] = _accuracy(teacher.model, val_features, val_labels, tokenizer.pad_token_id, batch_size)
+        report["student_val_accuracy"] = _accuracy(student, val_features, val_labels, tokenizer.pad_token_id, batch_size)
+
+    # Same artifacts as IntentClassifier.train so load_model() can serve the student
+    abs_output = teacher._resolve_save_dir(output_dir)
+    Path(abs_output).mkdir(parents=True, exist_ok=True)
+    student.save_pretrained(abs_output)
+    tokenizer.save_pretrained(abs_output)
+    with open(Path(abs_output) / "intent_mapping.json", "w") as f:
+        json.dump(teacher.intent_to_id, f, indent=2)
+    with open(Path(abs_output) / "distillation.json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"✓ Student saved to {abs_output} "
+          f"({report['student_params'] / 1e6:.1f}M params vs. {report['teacher_params'] / 1e6:.1f}M)")
+    return report
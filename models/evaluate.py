@@ -1,32 +1,232 @@
-"""Model evaluation."""
-from sklearn.metrics import f1_score, precision_recall_fscore_support
-from typing import List, Dict
+"""Model evaluation.
 
-def evaluate_model(model, test_data: List[Dict]) -> Dict:
-    """Evaluate model on test set."""
+Intent models are scored with batched ``predict_batch`` calls; dialogue
+scenarios run concurrently, one task per session, with intent predictions
+micro-batched through a BatchScheduler. Both report latency percentiles,
+and ``save_report`` writes a report (plus a confusion-matrix CSV) to
+``data.evaluation_dir``.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, f1_score, precision_recall_fscore_support
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.config import PROJECT_ROOT, load_config
+
+def latency_percentiles(samples_ms: List[float]) -> Dict:
+    if not samples_ms:
+        return {"count": 0}
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    return {
+        "count": int(samples.size),
+        "mean": float(samples.mean()),
+        "p50": float(np.percentile(samples, 50)),
+        "p90": float(np.percentile(samples, 90)),
+        "p99": float(np.percentile(samples, 99)),
+        "max": float(samples.max()),
+    }
+
+def intent_report(ground_truth: List[str], predictions: List[str]) -> Dict:
+    """Per-intent precision/recall/F1/support and the confusion matrix (rows = true intent)."""
+    labels = sorted(set(ground_truth) | set(predictions))
+    precision, recall, f1, support = precision_recall_fscore_support(
+        ground_truth, predictions, labels=labels, zero_division=0
+    )
+    return {
+        "per_intent": {
+            label: {"precision": float(p), "recall": float(r), "f1": float(f), "support": int(s)}
+            for label, p, r, f, s in zip(labels, precision, recall, f1, support)
+        },
+        "confusion_matrix": {
+            "labels": labels,
+            "matrix": confusion_matrix(ground_truth, predictions, labels=labels).tolist(),
+        },
+    }
+
+def evaluate_model(model, test_data: List[Dict], batch_size: int = 256) -> Dict:
+    """Evaluate model on test set.
+
+    Weighted f1/precision/recall as before, plus accuracy, a per-intent
+    report, the confusion matrix and intent-stage latency (per batch, and
+    amortized per text).
+    """
     predictions = []
-    ground_truth = []
+    ground_truth = [record["intent"] for record in test_data]
+    batch_ms, per_text_ms = [], []
 
-    for record in test_data:
-        pred, conf = model.predict(record["text"])
-        predictions.append(pred)
-        ground_truth.append(record["intent"])
+    for start in range(0, len(test_data), batch_size):
+        texts = [record["text"] for record in test_data[start:start + batch_size]]
+        t0 = time.perf_counter()
+        results = model.predict_batch(texts)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        predictions.extend(pred for pred, _ in results)
+        batch_ms.append(elapsed_ms)
+        per_text_ms.append(elapsed_ms / len(texts))
 
-    f1 = f1_score(ground_truth, predictions, average="weighted")
+    f1 = f1_score(ground_truth, predictions, average="weighted", zero_division=0)
     precision, recall, _, _ = precision_recall_fscore_support(
-        ground_truth, predictions, average="weighted"
+        ground_truth, predictions, average="weighted", zero_division=0
     )
+    total_s = sum(batch_ms) / 1000
+
+    return {
+        "f1": f1,
+        "precision": precision,
+        "recall": recall,
+        "accuracy": float(np.mean([p == t for p, t in zip(predictions, ground_truth)])) if test_data else 0.0,
+        "n": len(test_data),
+        "texts_per_sec": len(test_data) / total_s if total_s else 0.0,
+        "latency_ms": {
+            "intent_batch": latency_percentiles(batch_ms),
+            "intent_per_text": latency_percentiles(per_text_ms),
+        },
+        **intent_report(ground_truth, predictions),
+    }
+
+def evaluate_dialogue(manager, test_scenarios: List[Dict], concurrency: int = 32, max_batch_size: int = 32) -> Dict:
+    """Evaluate dialogue manager.
 
-    return {"f1": f1, "precision": precision, "recall": recall}
+    Scenarios sharing a ``session_id`` run in order; up to ``concurrency``
+    sessions run at once. Without a scheduler of its own the manager gets a
+    temporary BatchScheduler, so concurrent turns share forward passes.
+    """
+    return asyncio.run(_evaluate_dialogue(manager, test_scenarios, concurrency, max_batch_size))
 
-def evaluate_dialogue(manager, test_scenarios: List[Dict]) -> Dict:
-    """Evaluate dialogue manager."""
-    success_count = 0
+async def _evaluate_dialogue(manager, test_scenarios: List[Dict], concurrency: int, max_batch_size: int) -> Dict:
+    from nlu.batching import BatchScheduler
 
+    sessions: Dict[str, List[Dict]] = {}
     for scenario in test_scenarios:
-        result = manager.process_user_message(scenario["session_id"], scenario["message"])
-        if result["state"] == "completion":
-            success_count += 1
+        sessions.setdefault(scenario["session_id"], []).append(scenario)
+
+    own_scheduler = manager.intent_scheduler is None
+    if own_scheduler:
+        manager.intent_scheduler = BatchScheduler(manager.intent_classifier.predict_batch, max_batch_size=max_batch_size)
+    await manager.intent_scheduler.start()
+
+    slots = asyncio.Semaphore(concurrency)
+    turn_ms, success_count = [], 0
+    stage_ms: Dict[str, List[float]] = {}  # per-turn pipeline stage timings reported by the manager
+    intent_hits, intent_total = 0, 0
+
+    async def run_session(session_id: str, turns: List[Dict]):
+        nonlocal success_count, intent_hits, intent_total
+        async with slots:
+            for scenario in turns:
+                t0 = time.perf_counter()
+                result = await manager.process_message_async(session_id, scenario["message"])
+                turn_ms.append((time.perf_counter() - t0) * 1000)
+                for stage, ms in result.get("timings", {}).items():
+                    stage_ms.setdefault(stage[:-3] if stage.endswith("_ms") else stage, []).append(ms)
+                if result["state"] == "completion":
+                    success_count += 1
+                if "intent" in scenario:
+                    intent_total += 1
+                    intent_hits += int(result["intent"] == scenario["intent"])
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(run_session(sid, turns) for sid, turns in sessions.items()))
+    finally:
+        scheduler_summary = manager.intent_scheduler.get_summary()
+        if own_scheduler:
+            await manager.intent_scheduler.stop()
+            manager.intent_scheduler = None
+    elapsed = time.perf_counter() - started
 
     success_rate = success_count / max(len(test_scenarios), 1)
-    return {"success_rate": success_rate}
+    report = {
+        "success_rate": success_rate,
+        "n_turns": len(test_scenarios),
+        "n_sessions": len(sessions),
+        "turns_per_sec": len(test_scenarios) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "dialogue_turn": latency_percentiles(turn_ms),
+            **{stage: latency_percentiles(samples) for stage, samples in stage_ms.items()},
+        },
+        "batching": scheduler_summary,
+    }
+    if intent_total:
+        report["intent_accuracy"] = intent_hits / intent_total
+    return report
+
+def save_report(report: Dict, name: str, output_dir: Optional[str] = None) -> Path:
+    """Write ``<name>.json`` (and ``<name>_confusion_matrix.csv`` if present) to the evaluation directory."""
+    if output_dir is None:
+        output_dir = load_config().get("data", {}).get("evaluation_dir", "data/evaluation_results")
+    out = Path(output_dir)
+    if not out.is_absolute():
+        out = PROJECT_ROOT / out
+    out.mkdir(parents=True, exist_ok=True)
+
+    report = dict(report, name=name, created_at=datetime.now().isoformat(timespec="seconds"))
+    matrix = report.get("confusion_matrix")
+    if matrix:
+        with open(out / f"{name}_confusion_matrix.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["true \\ predicted"] + matrix["labels"])
+            for label, row in zip(matrix["labels"], matrix["matrix"]):
+                writer.writerow([label] + row)
+
+    path = out / f"{name}.json"
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2, default=float)
+    return path
+
+def print_summary(report: Dict):
+    for key in ("f1", "accuracy", "success_rate", "intent_accuracy"):
+        if key in report:
+            print(f"  {key}: {report[key]:.4f}")
+    for stage, stats in report.get("latency_ms", {}).items():
+        if stats.get("count"):
+            print(f"  {stage} latency: p50 {stats['p50']:.2f} ms, p90 {stats['p90']:.2f} ms, p99 {stats['p99']:.2f} ms")
+    worst = sorted(report.get("per_intent", {}).items(), key=lambda item: item[1]["f1"])[:5]
+    if worst:
+        print("  lowest F1: " + ", ".join(f"{intent} {m['f1']:.2f}" for intent, m in worst))
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the intent model and, optionally, dialogue scenarios.")
+    parser.add_argument("model_dir", nargs="?", default="models/distilbert_intent")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--test-data", default="data/processed/intents_test.jsonl")
+    parser.add_argument("--scenarios", help="JSONL of {session_id, message[, intent]} dialogue turns")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=32, help="dialogue sessions run at once")
+    parser.add_argument("--output-dir", help="default: data.evaluation_dir from config/config.yaml")
+    args = parser.parse_args()
+
+    from data_src.data_loader import DataLoader
+    from nlu.intent_classifier import IntentClassifier
+
+    classifier = IntentClassifier(device="cpu")
+    classifier.load_model(args.model_dir, backend=args.backend)
+
+    test_data = DataLoader.load_dialogues(args.test_data)
+    print(f"Evaluating intent model on {len(test_data)} examples...")
+    report = evaluate_model(classifier, test_data, batch_size=args.batch_size)
+    print_summary(report)
+    print(f"✓ Report written to {save_report(report, 'intent', args.output_dir)}")
+
+    if args.scenarios:
+        from dialogue.state_machine import DialogueManager
+        from tools.bank_api_adapter import BankingAPIAdapter
+
+        manager = DialogueManager(classifier, backend_adapter=BankingAPIAdapter())
+        scenarios = DataLoader.load_dialogues(args.scenarios)
+        print(f"Evaluating {len(scenarios)} dialogue turns...")
+        report = evaluate_dialogue(manager, scenarios, concurrency=args.concurrency)
+        print_summary(report)
+        print(f"✓ Report written to {save_report(report, 'dialogue', args.output_dir)}")
+
+if __name__ == "__main__":
+    main()
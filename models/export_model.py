@@ -1,12 +1,175 @@
 """Export models to different formats."""
+import argparse
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
 import torch
 
-def export_to_onnx(model, tokenizer, output_path: str):
-    """Export to ONNX format."""
-    try:
-        print(f"Exporting to ONNX: {output_path}")
-    except Exception as e:
-        print(f"Error: {e}")
+sys.path.append(str(Path(__file__).parent.parent))
+
+ONNX_VERIFY_TEXTS = [
+    "What is my account balance?",
+    "I lost my card",
+    "Show me every transaction from my checking account between the first and the fifteenth of August",
+]
+
+class _LogitsOnly(torch.nn.Module):
+    """Wrap a transformers classifier so the traced graph has a single `logits` output."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+def export_to_onnx(model, tokenizer, output_path: str, opset_version: int = 14, atol: float = 1e-4) -> float:
+    """Export to ONNX format with dynamic batch/sequence axes and verify logits.
+
+    Returns the max absolute logit difference between PyTorch and ONNX Runtime.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Exporting to ONNX: {output_path}")
+
+    model = model.to("cpu").eval()
+    sample = tokenizer(ONNX_VERIFY_TEXTS[:2], return_tensors="pt", padding=True)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model).eval(),
+            (sample["input_ids"], sample["attention_mask"]),
+            str(output_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=opset_version,
+            do_constant_folding=True,
+        )
+
+    max_diff = verify_onnx_export(model, tokenizer, output_path, atol=atol)
+    print(f"✓ ONNX export verified (max |Δlogit| = {max_diff:.2e})")
+    return max_diff
+
+def verify_onnx_export(model, tokenizer, onnx_path: str, atol: float = 1e-4) -> float:
+    """Compare PyTorch and ONNX Runtime logits on batches of different shapes."""
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(str(onnx_path), providers=["CPUExecutionProvider"])
+    max_diff = 0.0
+
+    # Different batch sizes and sequence lengths than the trace exercise the dynamic axes
+    for texts in (ONNX_VERIFY_TEXTS[:1], ONNX_VERIFY_TEXTS):
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+        with torch.no_grad():
+            expected = model(input_ids=inputs["input_ids"], attention_mask=inputs["attention_mask"]).logits.numpy()
+        actual = session.run(
+            ["logits"],
+            {"input_ids": inputs["input_ids"].numpy(), "attention_mask": inputs["attention_mask"].numpy()},
+        )[0]
+        max_diff = max(max_diff, float(np.abs(expected - actual).max()))
+
+    if max_diff > atol:
+        raise ValueError(f"ONNX logits differ from PyTorch by {max_diff:.2e} (atol={atol:.0e})")
+    return max_diff
+
+def export_intent_classifier(model_dir: str = "models/distilbert_intent") -> str:
+    """Export a trained IntentClassifier directory to <model_dir>/model.onnx."""
+    from nlu.intent_classifier import IntentClassifier
+    from nlu.onnx_backend import ONNX_MODEL_FILE
+
+    classifier = IntentClassifier(device="cpu")
+    classifier.load_model(model_dir)
+
+    output_path = Path(classifier._resolve_load_path(model_dir)) / ONNX_MODEL_FILE
+    export_to_onnx(classifier.model, classifier.tokenizer, str(output_path))
+    return str(output_path)
+
+def quantize_onnx_model(onnx_path: str, output_path: str) -> str:
+    """Dynamically quantize an exported ONNX model's weights to INT8."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(onnx_path), str(output_path), weight_type=QuantType.QInt8)
+    return str(output_path)
+
+def _model_size_mb(classifier) -> float:
+    if classifier.backend == "onnx":
+        return os.path.getsize(classifier.model.onnx_path) / 1e6
+    buffer = io.BytesIO()
+    torch.save(classifier.model.state_dict(), buffer)
+    return buffer.tell() / 1e6
+
+def quantize_intent_classifier(
+    model_dir: str,
+    val_data: list,
+    backend: str = "torch",
+    f1_tolerance: float = 0.01,
+) -> dict:
+    """Quantize the intent model to INT8 and accept it only if weighted F1 holds up.
+
+    The INT8 model is accepted when ``fp32_f1 - int8_f1 <= f1_tolerance`` on
+    ``val_data`` (the validation split, so the test split stays unbiased). The
+    verdict and a hash of the fp32 weights it was measured on are recorded in
+    ``quantization.json`` in the model directory, which
+    IntentClassifier.load_model(quantize=True) checks.
+    """
+    from models.evaluate import evaluate_model
+    from nlu.intent_classifier import IntentClassifier, QUANTIZATION_REPORT_FILE, weights_fingerprint
+    from nlu.onnx_backend import ONNX_INT8_MODEL_FILE, ONNX_MODEL_FILE
+
+    fp32 = IntentClassifier(device="cpu")
+    fp32.load_model(model_dir, backend=backend)
+    abs_dir = fp32.model_dir
+
+    int8_onnx = abs_dir / ONNX_INT8_MODEL_FILE
+    if backend == "onnx":
+        quantize_onnx_model(abs_dir / ONNX_MODEL_FILE, int8_onnx)
+
+    int8 = IntentClassifier(device="cpu")
+    int8.load_model(model_dir, backend=backend)
+    int8.quantize()
+
+    print(f"Evaluating fp32 vs int8 ({backend}) on {len(val_data)} validation examples...")
+    fp32_metrics = evaluate_model(fp32, val_data)
+    int8_metrics = evaluate_model(int8, val_data)
+    f1_drop = fp32_metrics["f1"] - int8_metrics["f1"]
+
+    result = {
+        "accepted": bool(f1_drop <= f1_tolerance),
+        "f1_tolerance": f1_tolerance,
+        "fp32_f1": float(fp32_metrics["f1"]),
+        "int8_f1": float(int8_metrics["f1"]),
+        "fp32_size_mb": _model_size_mb(fp32),
+        "int8_size_mb": _model_size_mb(int8),
+        "weights_sha256": weights_fingerprint(abs_dir, backend),
+    }
+
+    report_file = abs_dir / QUANTIZATION_REPORT_FILE
+    report = {}
+    if report_file.exists():
+        with open(report_file, "r") as f:
+            report = json.load(f)
+    report[backend] = result
+    with open(report_file, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if result["accepted"]:
+        print(f"✓ INT8 model accepted: F1 {result['fp32_f1']:.4f} -> {result['int8_f1']:.4f}, "
+              f"size {result['fp32_size_mb']:.1f}MB -> {result['int8_size_mb']:.1f}MB")
+    else:
+        print(f"❌ INT8 model rejected: F1 dropped by {f1_drop:.4f} (tolerance {f1_tolerance})")
+        if backend == "onnx" and int8_onnx.exists():
+            int8_onnx.unlink()
+
+    return result
 
 def export_to_huggingface(model, tokenizer, repo_name: str):
     """Push model to Hugging Face Hub."""
@@ -14,3 +177,23 @@ def export_to_huggingface(model, tokenizer, repo_name: str):
         print(f"Pushing to Hub: {repo_name}")
     except Exception as e:
         print(f"Error: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the intent classifier for optimized serving.")
+    parser.add_argument("model_dir", nargs="?", default="models/distilbert_intent")
+    parser.add_argument("--quantize", action="store_true", help="Produce an INT8 model behind the accuracy gate")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="onnx")
+    parser.add_argument("--val-data", default="data/processed/intents_val.jsonl", help="Split the F1 gate is scored on")
+    parser.add_argument("--f1-tolerance", type=float, default=0.01)
+    args = parser.parse_args()
+
+    if not args.quantize or args.backend == "onnx":
+        export_intent_classifier(args.model_dir)
+
+    if args.quantize:
+        from data_src.data_loader import DataLoader
+        val_data = DataLoader.load_dialogues(args.val_data)
+        quantize_intent_classifier(args.model_dir, val_data, backend=args.backend, f1_tolerance=args.f1_tolerance)
+
+if __name__ == "__main__":
+    main()
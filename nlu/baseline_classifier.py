@@ -0,0 +1,124 @@
+"""TF-IDF + linear baseline intent classifier."""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class BaselineClassifier:
+    """Sparse TF-IDF + logistic regression intent model.
+
+    Cheap enough to run on every message, so it serves as the first tier of
+    CascadeClassifier. ``threshold`` is the confidence above which its
+    predictions are trusted, calibrated on the validation split.
+    """
+
+    MODEL_FILE = "baseline.joblib"
+    META_FILE = "baseline_meta.json"
+
+    def __init__(self, max_features: int = 50000, C: float = 10.0):
+        self.max_features = max_features
+        self.C = C
+        self.pipeline = None  # sklearn Pipeline
+        self.threshold: Optional[float] = None
+        self.metrics: Dict = {}
+
+    # ---------- training ----------
+    def train(self, train_data: List[Dict], val_data: Optional[List[Dict]] = None, target_accuracy: float = 0.98) -> Dict:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+
+        self.pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer(
+                lowercase=True,
+                ngram_range=(1, 2),
+                sublinear_tf=True,
+                max_features=self.max_features,
+            )),
+            ("clf", LogisticRegression(C=self.C, max_iter=2000)),
+        ])
+        self.pipeline.fit([d["text"] for d in train_data], [d["intent"] for d in train_data])
+
+        if val_data:
+            self.threshold = self.calibrate_threshold(val_data, target_accuracy)
+        return self.metrics
+
+    def calibrate_threshold(self, val_data: List[Dict], target_accuracy: float = 0.98) -> float:
+        """Lowest confidence threshold whose accepted predictions reach target_accuracy.
+
+        Returns a value above 1.0 (never accept) if no threshold reaches the target.
+        """
+        probs = self.predict_proba([d["text"] for d in val_data])
+        preds = self.pipeline.classes_[probs.argmax(axis=1)]
+        confidence = probs.max(axis=1)
+        correct = preds == np.array([d["intent"] for d in val_data])
+
+        order = np.argsort(-confidence)
+        cumulative_accuracy = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+        passing = np.nonzero(cumulative_accuracy >= target_accuracy)[0]
+
+        threshold = float(confidence[order][passing.max()]) if len(passing) else 1.01
+        accepted = confidence >= threshold
+        self.metrics = {
+            "val_accuracy": float(correct.mean()),
+            "target_accuracy": target_accuracy,
+            "threshold": threshold,
+            "coverage": float(accepted.mean()),
+            "accepted_accuracy": float(correct[accepted].mean()) if accepted.any() else 0.0,
+        }
+        return threshold
+
+    # ---------- inference ----------
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        if self.pipeline is None:
+            raise ValueError("Model not loaded. Call load() or train() first.")
+        return self.pipeline.predict_proba(texts)
+
+    def predict(self, text: str, return_probs: bool = False):
+        return self.predict_batch([text], return_probs=return_probs)[0]
+
+    def predict_batch(self, texts: List[str], return_probs: bool = False) -> List:
+        """Same result format as IntentClassifier.predict_batch."""
+        probs = self.predict_proba(texts)
+        classes = self.pipeline.classes_
+        results = []
+
+        for row in probs:
+            pred_idx = int(row.argmax())
+            if not return_probs:
+                results.append((classes[pred_idx], float(row[pred_idx])))
+                continue
+            top_k = np.argsort(row)[::-1][:3]
+            results.append({
+                "intent": classes[pred_idx],
+                "confidence": float(row[pred_idx]),
+                "top_k": [{"intent": classes[i], "score": float(row[i])} for i in top_k],
+            })
+
+        return results
+
+    # ---------- persistence ----------
+    def save(self, output_dir: str):
+        import joblib
+
+        out = Path(output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        joblib.dump(self.pipeline, out / self.MODEL_FILE)
+        with open(out / self.META_FILE, "w") as f:
+            json.dump({"threshold": self.threshold, "metrics": self.metrics}, f, indent=2)
+        print(f"✓ Baseline saved to {out}")
+
+    def load(self, model_dir: str):
+        import joblib
+
+        model_dir = Path(model_dir)
+        self.pipeline = joblib.load(model_dir / self.MODEL_FILE)
+        meta_file = model_dir / self.META_FILE
+        if meta_file.exists():
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            self.threshold = meta.get("threshold")
+            self.metrics = meta.get("metrics", {})
+        print(f"✓ Baseline loaded from {model_dir}")
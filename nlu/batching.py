@@ -0,0 +1,167 @@
+"""Dynamic micro-batching of intent predictions across concurrent requests."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.metrics_collector import Histogram
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+QUEUE_WAIT_MS_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100]
+
+
+class BatchScheduler:
+    """Gather pending predict requests from concurrent sessions into one batch.
+
+    A batch is dispatched once ``max_batch_size`` requests are queued or the
+    oldest request has waited ``max_wait_ms``. The forward pass runs on a
+    dedicated worker thread so the event loop keeps accepting requests.
+    ``max_concurrent_batches > 1`` lets several batches be in flight at once,
+    for a predict_batch_fn that runs them in parallel (InferenceWorkerPool).
+    """
+
+    def __init__(
+        self,
+        predict_batch_fn: Callable[[List[str]], List[Tuple[str, float]]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_concurrent_batches: int = 1,
+    ):
+        self.predict_batch_fn = predict_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_concurrent_batches = max_concurrent_batches
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="intent-batch")
+
+    async def start(self):
+        """Start the background batching loop on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the batching loop and fail any requests still queued."""
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Let batches already handed to the model finish
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+        self._executor.shutdown(wait=False)
+
+    async def predict(self, text: str, encoding: Optional[Dict] = None) -> Tuple[str, float]:
+        """Queue one text and wait for its (intent, confidence).
+
+        ``encoding`` is the message's pre-computed tokenizer output; it is
+        forwarded to ``predict_batch_fn`` when every request in a batch has one.
+        """
+        if self._task is None:
+            await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, encoding, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List:
+        """Block for the first request, then fill the batch until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # Stopping: put the requests back so stop() fails them with the rest of the queue
+            for request in batch:
+                self._queue.put_nowait(request)
+            raise
+
+        # Anything that queued up while we were waiting rides along for free
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        while True:
+            # Don't take requests off the queue until a batch slot is free, so
+            # they keep accumulating into the next batch meanwhile
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            # A task even with one batch slot (the semaphore already serializes
+            # them), so cancelling this loop in stop() never interrupts a dispatch
+            task = asyncio.create_task(self._dispatch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, batch: List):
+        try:
+            dispatched_at = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, _, enqueued_at in batch:
+                self.queue_wait_ms.observe((dispatched_at - enqueued_at) * 1000)
+
+            texts = [text for text, _, _, _ in batch]
+            encodings = [encoding for _, encoding, _, _ in batch]
+            if all(encoding is not None for encoding in encodings):
+                predict = partial(self.predict_batch_fn, texts, encodings=encodings)
+            else:
+                predict = partial(self.predict_batch_fn, texts)
+
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._executor, predict)
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, _, future, _), result in zip(batch, results):
+                # The caller may have been cancelled (e.g. client disconnected)
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def get_summary(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_concurrent_batches": self.max_concurrent_batches,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "batch_size": self.batch_sizes.get_summary(),
+            "queue_wait_ms": self.queue_wait_ms.get_summary(),
+        }
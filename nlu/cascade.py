@@ -0,0 +1,92 @@
+"""Two-tier intent classification: cheap baseline first, transformer on low confidence."""
+from typing import Dict, List, Optional
+
+
+class CascadeClassifier:
+    """Answer from the baseline when it is confident, else fall back to DistilBERT.
+
+    Exposes the same predict / predict_batch interface as IntentClassifier so it
+    can be handed to DialogueManager or BatchScheduler unchanged.
+    """
+
+    def __init__(self, baseline, transformer, threshold: Optional[float] = None):
+        self.baseline = baseline
+        self.transformer = transformer
+        self.threshold = threshold if threshold is not None else baseline.threshold
+        if self.threshold is None:
+            raise ValueError("No cascade threshold: calibrate the baseline or pass threshold=")
+
+        self.tier_counts = {"baseline": 0, "transformer": 0}
+
+    @property
+    def cache(self):
+        return getattr(self.transformer, "cache", None)
+
+    def warmup(self, **kwargs) -> float:
+        """Warm up both tiers; see IntentClassifier.warmup."""
+        import time
+
+        start = time.perf_counter()
+        self.baseline.predict_batch(["check my account balance"])
+        if hasattr(self.transformer, "warmup"):
+            self.transformer.warmup(**kwargs)
+        return time.perf_counter() - start
+
+    def predict(self, text: str, return_probs: bool = False, encoding: Optional[Dict] = None):
+        encodings = [encoding] if encoding is not None else None
+        return self.predict_batch([text], return_probs=return_probs, encodings=encodings)[0]
+
+    def predict_batch(self, texts: List[str], return_probs: bool = False, encodings: Optional[List[Dict]] = None) -> List:
+        results = self._predict_tiered(texts, encodings)
+        if return_probs:
+            return results
+        return [(r["intent"], r["confidence"]) for r in results]
+
+    def _predict_tiered(self, texts: List[str], encodings: Optional[List[Dict]] = None) -> List[Dict]:
+        results = self.baseline.predict_batch(texts, return_probs=True)
+        escalate = [i for i, r in enumerate(results) if r["confidence"] < self.threshold]
+
+        if escalate:
+            deep = self.transformer.predict_batch(
+                [texts[i] for i in escalate],
+                return_probs=True,
+                encodings=[encodings[i] for i in escalate] if encodings is not None else None,
+            )
+            for i, result in zip(escalate, deep):
+                results[i] = result
+
+        escalated = set(escalate)
+        for i, result in enumerate(results):
+            result["tier"] = "transformer" if i in escalated else "baseline"
+
+        self.tier_counts["transformer"] += len(escalate)
+        self.tier_counts["baseline"] += len(texts) - len(escalate)
+        return results
+
+    def evaluate(self, test_data: List[Dict]) -> Dict:
+        """Cascade hit rate plus accuracy overall and per tier."""
+        results = self._predict_tiered([d["text"] for d in test_data])
+        per_tier = {"baseline": [0, 0], "transformer": [0, 0]}
+
+        for record, result in zip(test_data, results):
+            tier = per_tier[result["tier"]]
+            tier[0] += int(result["intent"] == record["intent"])
+            tier[1] += 1
+
+        total = max(len(test_data), 1)
+        return {
+            "threshold": self.threshold,
+            "hit_rate": per_tier["baseline"][1] / total,
+            "accuracy": (per_tier["baseline"][0] + per_tier["transformer"][0]) / total,
+            "baseline_accuracy": per_tier["baseline"][0] / max(per_tier["baseline"][1], 1),
+            "transformer_accuracy": per_tier["transformer"][0] / max(per_tier["transformer"][1], 1),
+        }
+
+    def get_summary(self) -> Dict:
+        total = sum(self.tier_counts.values())
+        return {
+            "threshold": self.threshold,
+            "baseline": self.tier_counts["baseline"],
+            "transformer": self.tier_counts["transformer"],
+            "hit_rate": self.tier_counts["baseline"] / total if total else 0.0,
+        }
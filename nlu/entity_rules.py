@@ -0,0 +1,166 @@
+"""Compiled rules that extract banking slots without statistical NER."""
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from core.config import PROJECT_ROOT
+from .validators import ACCOUNT_SYNONYMS, DEFAULT_PRODUCT_TYPES, EntityValidator
+
+DEFAULT_ENTITIES_PATH = PROJECT_ROOT / "config" / "entities.yaml"
+
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "¥": "JPY", "£": "GBP"}
+CURRENCY_WORDS = {"dollar": "USD", "buck": "USD", "euro": "EUR", "pound": "GBP", "yen": "JPY"}
+
+# spaCy labels that correspond to a DialoguePolicy slot
+SPACY_LABEL_SLOTS = {"MONEY": "amount", "DATE": "date_range", "ORG": "merchant_name"}
+
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+)
+_DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+_NUMBER = r"\d[\d,]*(?:\.\d+)?"
+
+# Left over after the rules ran, any of these means spaCy may still find something
+_DIGIT = re.compile(r"\d")
+_DATE_WORD = re.compile(rf"\b(?:{_MONTH}|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", re.I)
+_CAPITALIZED = re.compile(r"\b[A-Z][a-z][\w&'-]*")
+
+# Before an account name that doubles as a verb ("checking"), marks the noun use
+_ACCOUNT_CONTEXT = re.compile(r"\b(?:my|our|your|his|her|their|the|this|that|a|an|in)\s+$", re.I)
+
+
+class EntityRuleEngine:
+    """Extract ``account_type``, ``source_account``/``target_account``, ``amount``,
+    ``date_range``, ``card_last4`` and ``account_number`` with compiled regexes.
+
+    Values are normalized with EntityValidator where it has a parser. Rules run
+    in order and a value claimed by one rule is not matched again by a later one.
+    """
+
+    def __init__(self, entities_path: Optional[Path] = None):
+        self.product_types = self._load_product_types(Path(entities_path or DEFAULT_ENTITIES_PATH))
+        self._account_names = {name.replace("_", " "): name for name in self.product_types}
+        self._account_names.update({k: v for k, v in ACCOUNT_SYNONYMS.items() if v in self.product_types})
+        self.rules = self._compile_rules()
+
+    @staticmethod
+    def _load_product_types(path: Path) -> List[str]:
+        if not path.exists():
+            return list(DEFAULT_PRODUCT_TYPES)
+        with open(path, "r") as f:
+            schema = yaml.safe_load(f) or {}
+        return schema.get("entities", {}).get("PRODUCT_TYPE", {}).get("values") or list(DEFAULT_PRODUCT_TYPES)
+
+    def _compile_rules(self) -> List[Tuple[str, "re.Pattern", Callable]]:
+        # Longest names first so "credit card" wins over a shorter prefix
+        account = "|".join(re.escape(name) for name in sorted(self._account_names, key=len, reverse=True))
+        account = rf"(?P<value>{account})s?(?:\s+account)?"
+
+        return [
+            ("source_account", re.compile(rf"\bfrom\s+(?:my\s+|the\s+)?{account}\b", re.I), self._account_value),
+            ("target_account", re.compile(rf"\b(?:to|into)\s+(?:my\s+|the\s+)?{account}\b", re.I), self._account_value),
+            ("account_type", re.compile(rf"\b{account}\b", re.I), self._account_type_value),
+            ("card_last4", re.compile(
+                r"\b(?:card|ending(?:\s+in)?|ends\s+in|last\s+(?:4|four)(?:\s+digits)?)\b[^\d*]{0,20}?(?P<value>\**\d{4})\b",
+                re.I,
+            ), self._card_value),
+            ("account_number", re.compile(r"(?<![\w*])(?P<value>\d{10}|\*{4,}\d{4})\b"), self._account_number_value),
+            ("amount", re.compile(
+                rf"(?P<symbol>[$€¥£])\s?(?P<number>{_NUMBER})"
+                rf"|\b(?P<number2>{_NUMBER})\s?(?P<code>usd|eur|gbp|jpy|dollars?|bucks?|euros?|pounds?|yen)\b",
+                re.I,
+            ), self._amount_value),
+            ("date_range", re.compile(
+                r"\d{4}-\d{2}-\d{2}\s*(?:to|through|-)\s*\d{4}-\d{2}-\d{2}"
+                rf"|\b{_MONTH}\.?\s+{_DAY}\s*(?:-|to|through)\s*(?:{_MONTH}\.?\s+)?{_DAY}\b"
+                r"|\b(?:last|past|this|previous)\s+(?:\d+\s+)?(?:days?|weeks?|months?|years?)\b"
+                r"|\b(?:today|yesterday)\b",
+                re.I,
+            ), self._date_value),
+        ]
+
+    # ---------- value normalizers ----------
+    def _account_value(self, match) -> str:
+        return self._account_names[match.group("value").lower()]
+
+    def _account_type_value(self, match) -> Optional[str]:
+        # "I was checking my card" is the verb: an -ing name needs "account" after it or a determiner before it
+        if match.group("value").lower().endswith("ing"):
+            has_suffix = match.group(0).lower().endswith("account")
+            if not has_suffix and not _ACCOUNT_CONTEXT.search(match.string, 0, match.start()):
+                return None
+        return self._account_value(match)
+
+    @staticmethod
+    def _card_value(match) -> Optional[str]:
+        return EntityValidator.validate_card_last4(match.group("value")[-4:])
+
+    @staticmethod
+    def _account_number_value(match) -> Optional[str]:
+        value = match.group("value")
+        # Redacted numbers ("******7890") are kept masked
+        return value if value.startswith("*") else EntityValidator.validate_account_number(value)
+
+    @staticmethod
+    def _amount_value(match) -> Optional[Dict]:
+        if match.group("symbol"):
+            number, currency = match.group("number"), CURRENCY_SYMBOLS[match.group("symbol")]
+        else:
+            code = match.group("code").lower().rstrip("s")
+            number, currency = match.group("number2"), CURRENCY_WORDS.get(code, code.upper())
+        try:
+            return {"amount": float(number.replace(",", "")), "currency": currency}
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _date_value(match):
+        # Keep the phrase itself when EntityValidator can't turn it into dates
+        return EntityValidator.parse_date_range(match.group(0)) or match.group(0)
+
+    # ---------- extraction ----------
+    def extract(self, text: str) -> List[Dict]:
+        """Rule matches as ``{"text", "type", "value", "start", "end"}``, in text order."""
+        entities = []
+        claimed: List[Tuple[int, int]] = []
+
+        for slot, pattern, to_value in self.rules:
+            for match in pattern.finditer(text):
+                # Only the value itself is claimed, so "credit card ending in 1234"
+                # yields both the account type and the card digits
+                c_start, c_end = match.span("value") if "value" in pattern.groupindex else match.span()
+                if any(c_start < end and start < c_end for start, end in claimed):
+                    continue
+                value = to_value(match)
+                if value is None:
+                    continue
+                claimed.append((c_start, c_end))
+                entities.append({
+                    "text": match.group(0),
+                    "type": slot,
+                    "value": value,
+                    "start": match.start(),
+                    "end": match.end(),
+                })
+
+        return sorted(entities, key=lambda e: e["start"])
+
+    @staticmethod
+    def needs_ner(text: str, entities: List[Dict]) -> bool:
+        """Whether text outside the rule matches could still hold an entity spaCy would find.
+
+        Digits, month/weekday names and capitalized words (past the first
+        word) are the cues; plain lowercase text never needs spaCy.
+        """
+        residual = list(text)
+        for entity in entities:
+            residual[entity["start"]:entity["end"]] = " " * (entity["end"] - entity["start"])
+        residual = "".join(residual)
+
+        if _DIGIT.search(residual) or _DATE_WORD.search(residual):
+            return True
+        return any(match.start() > 0 and text[:match.start()].rstrip()[-1:] not in ".!?"
+                   for match in _CAPITALIZED.finditer(residual))
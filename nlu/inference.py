@@ -1,30 +1,144 @@
 """Batch and streaming inference for high-throughput scenarios."""
-import torch
-from typing import List, Dict
-import asyncio
+import numpy as np
+from typing import List, Dict, Optional
+
+from .onnx_backend import OnnxSequenceClassifier
+
+def pad_batch(batch: Dict[str, List], pad_token_id: int) -> Dict[str, np.ndarray]:
+    """Right-pad token id lists to the batch's longest row as int64 arrays (cheaper than tokenizer.pad)."""
+    width = max(len(ids) for ids in batch["input_ids"])
+    padded = {}
+    for key, rows in batch.items():
+        fill = pad_token_id if key == "input_ids" else 0
+        array = np.full((len(rows), width), fill, dtype=np.int64)
+        for i, row in enumerate(rows):
+            array[i, :len(row)] = row
+        padded[key] = array
+    return padded
 
 class Inferencer:
-    """High-performance inference engine."""
+    """High-performance inference engine.
+
+    Inputs are tokenized once without padding, grouped by token length so each
+    batch only pads to its own longest member, and results are returned in the
+    original input order.
+    """
 
-    def __init__(self, model, tokenizer, device="cpu", batch_size=32):
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        device="cpu",
+        batch_size=32,
+        id_to_intent: Optional[Dict[int, str]] = None,
+        max_length: int = 128,
+        sort_by_length: bool = True,
+    ):
         self.model = model
         self.tokenizer = tokenizer
         self.device = device
         self.batch_size = batch_size
+        self.max_length = max_length
+        self.sort_by_length = sort_by_length
+
+        if id_to_intent is None:
+            id_to_intent = {int(k): v for k, v in getattr(getattr(model, "config", None), "id2label", {}).items()}
+        self.id_to_intent = id_to_intent
+
+    @classmethod
+    def from_classifier(cls, classifier, **kwargs) -> "Inferencer":
+        """Build an inferencer sharing a loaded IntentClassifier's model and label map."""
+        return cls(
+            classifier.model,
+            classifier.tokenizer,
+            device=classifier.device,
+            id_to_intent=classifier.id_to_intent,
+            **kwargs,
+        )
 
-    def batch_predict(self, texts: List[str]) -> List[Dict]:
-        """Batch inference for multiple texts."""
-        results = []
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            batch_results = self._inference_batch(batch)
-            results.extend(batch_results)
+    def batch_predict(self, texts: List[str], top_k: int = 0, encodings: Optional[List[Dict]] = None) -> List[Dict]:
+        """Batch inference for multiple texts.
+
+        Returns one dict per input with ``intent`` and ``confidence``, plus a
+        ``top_k`` list of ``{"intent", "score"}`` when ``top_k > 0``.
+        ``encodings`` (one unpadded tokenizer output per text, e.g. from
+        BankingTokenizer) skips tokenization here.
+        """
+        if not texts:
+            return []
+
+        if encodings is None:
+            features = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        else:
+            features = {key: [encoding[key] for encoding in encodings] for key in ("input_ids", "attention_mask")}
+        lengths = [len(ids) for ids in features["input_ids"]]
+
+        results: List[Optional[Dict]] = [None] * len(texts)
+        for indices in self._batch_indices(lengths):
+            batch = {key: [features[key][i] for i in indices] for key in features.keys()}
+            probs = self._softmax(self._inference_batch(batch))
+            for i, row in zip(indices, probs):
+                results[i] = self._decode(row, top_k)
         return results
 
-    def _inference_batch(self, batch: List[str]) -> List[Dict]:
-        """Internal batch processing."""
-        inputs = self.tokenizer(batch, return_tensors="pt", padding=True, truncation=True)
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+    def _batch_indices(self, lengths: List[int]) -> List[List[int]]:
+        """Split input positions into batches, grouped by length when enabled."""
+        order = list(range(len(lengths)))
+        if self.sort_by_length:
+            order.sort(key=lengths.__getitem__)
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def _inference_batch(self, batch: Dict[str, List]) -> np.ndarray:
+        """Pad one batch to its longest member and return the raw logits."""
+        padded = self._pad(batch)
+        if isinstance(self.model, OnnxSequenceClassifier):
+            # ONNX Runtime takes and returns numpy arrays; no torch needed
+            return np.asarray(self.model(**padded).logits, dtype=np.float32)
+
+        import torch
+        inputs = {k: torch.from_numpy(v).to(self.device) for k, v in padded.items()}
         with torch.no_grad():
-            outputs = self.model(**inputs)
-        return outputs
+            logits = self.model(**inputs).logits
+        return logits.float().cpu().numpy()
+
+    def _pad(self, batch: Dict[str, List]) -> Dict[str, np.ndarray]:
+        return pad_batch(batch, self.tokenizer.pad_token_id)
+
+    @staticmethod
+    def _softmax(logits: np.ndarray) -> np.ndarray:
+        shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return shifted / shifted.sum(axis=-1, keepdims=True)
+
+    def _decode(self, probs: np.ndarray, top_k: int = 0) -> Dict:
+        pred_idx = int(np.argmax(probs))
+        result = {
+            "intent": self.id_to_intent.get(pred_idx, str(pred_idx)),
+            "confidence": float(probs[pred_idx]),
+        }
+
+        if top_k:
+            k = min(top_k, probs.shape[-1])
+            top = np.argpartition(probs, -k)[-k:]
+            top = top[np.argsort(probs[top])[::-1]]
+            result["top_k"] = [
+                {"intent": self.id_to_intent.get(int(idx), str(int(idx))), "score": float(probs[idx])}
+                for idx in top
+            ]
+
+        return result
+
+    @staticmethod
+    def padding_stats(lengths: List[int], batch_size: int, sort_by_length: bool = True) -> Dict:
+        """Count real vs. padded tokens for a batching strategy, without running the model."""
+        order = sorted(lengths) if sort_by_length else list(lengths)
+        real = sum(order)
+        padded = 0
+        for i in range(0, len(order), batch_size):
+            batch = order[i:i + batch_size]
+            padded += max(batch) * len(batch)
+
+        return {
+            "real_tokens": real,
+            "padded_tokens": padded,
+            "padding_ratio": (padded - real) / padded if padded else 0.0,
+        }
@@ -1,20 +1,67 @@
-"""Intent Classification using DistilBERT (absolute path-safe)."""
+"""Intent Classification using DistilBERT (absolute path-safe).
+
+torch, transformers, datasets and sklearn are imported where they are first
+needed, so serving processes only pay for what they use and training-only
+dependencies never load in the API.
+"""
+import hashlib
 import json
 import os
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 import numpy as np
-import torch
-from datasets import Dataset
-from sklearn.metrics import precision_recall_fscore_support
-from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
-    TrainingArguments,
-    Trainer,
-    EarlyStoppingCallback,
-)
+
+from core.config import PROJECT_ROOT
+from .inference import Inferencer
+from .mmap_loader import SAFETENSORS_FILE, load_sequence_classifier_mmap
+from .prediction_cache import PredictionCache
+from .onnx_backend import ONNX_INT8_MODEL_FILE, ONNX_MODEL_FILE, OnnxSequenceClassifier
+
+# Token lengths of synthetic warmup batches; banking utterances are mostly short
+WARMUP_LENGTHS = (8, 16, 32, 64)
+
+# Written by models/export_model.quantize_intent_classifier; INT8 loading requires its approval
+QUANTIZATION_REPORT_FILE = "quantization.json"
+
+def weights_fingerprint(model_dir: Path, backend: str) -> Optional[str]:
+    """sha256 of the fp32 weights a backend's INT8 model is quantized from; None if there are none."""
+    names = (ONNX_MODEL_FILE,) if backend == "onnx" else (SAFETENSORS_FILE, "pytorch_model.bin")
+    for name in names:
+        path = Path(model_dir) / name
+        if path.exists():
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            return digest.hexdigest()
+    return None
+
+def _precomputed_length_sampler(args, dataset):
+    """LengthGroupedSampler over a dataset's precomputed ``lengths`` (TokenizedCorpus).
+
+    Trainer only reads lengths from a ``datasets.Dataset`` column; for anything
+    else it passes none and the sampler loads every example to measure it.
+    Returns None when length grouping is off or the dataset has no lengths.
+    """
+    lengths = getattr(dataset, "lengths", None)
+    if not args.group_by_length or lengths is None:
+        return None
+    from transformers.trainer_pt_utils import LengthGroupedSampler
+    return LengthGroupedSampler(
+        args.train_batch_size * args.gradient_accumulation_steps,
+        dataset=dataset,
+        lengths=np.asarray(lengths).tolist(),
+    )
+
+def resolve_load_path(name_or_path: str, project_root: Path = PROJECT_ROOT) -> str:
+    """Absolute path for a local (relative) directory under ``project_root``; anything else
+    (absolute path or HF repo id) is returned unchanged."""
+    p = Path(name_or_path)
+    if p.is_absolute():
+        return str(p)
+    local = (project_root / p).resolve()
+    return str(local) if local.exists() else name_or_path  # fallback to hub id
 
 class IntentClassifier:
     """DistilBERT-based intent classifier with robust path resolution."""
@@ -25,29 +72,32 @@ class IntentClassifier:
         num_labels: int = 77,
         device: Optional[str] = None,
         project_root: Optional[Path] = None,  # allow override in tests
+        cache_size: int = 0,  # 0 disables the prediction cache
+        cache_ttl: Optional[float] = None,
     ):
         self.model_name = model_name
         self.num_labels = num_labels
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = device  # resolved when a torch model is loaded
+        self.backend = "torch"
+        self.quantized = False
+        self.model_dir: Optional[Path] = None
+        self.intra_op_threads = 0
 
-        # Resolve project root to the repo root (…/your-repo/)
-        # file: .../src/nlu/intent_classifier.py -> parents[2] == repo root with src/ and models/
-        self.PROJECT_ROOT = Path(__file__).resolve().parents[2] if project_root is None else Path(project_root)
+        # Relative model and output paths are resolved against the repo root, not the cwd
+        self.PROJECT_ROOT = PROJECT_ROOT if project_root is None else Path(project_root)
 
         self.tokenizer = None
         self.model = None
         self.intent_to_id: Dict[str, int] = {}
         self.id_to_intent: Dict[int, str] = {}
+        self.inferencer: Optional[Inferencer] = None
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size else None
 
     # ---------- path helpers ----------
     def _resolve_load_path(self, name_or_path: str) -> str:
         """If name_or_path is a local (relative) directory under PROJECT_ROOT, return its absolute path.
         Otherwise return name_or_path (treated as HF repo id or absolute path)."""
-        p = Path(name_or_path)
-        if p.is_absolute():
-            return str(p)
-        local = (self.PROJECT_ROOT / p).resolve()
-        return str(local) if local.exists() else name_or_path  # fallback to hub id
+        return resolve_load_path(name_or_path, self.PROJECT_ROOT)
 
     def _resolve_save_dir(self, output_dir: str) -> str:
         p = Path(output_dir)
@@ -69,19 +119,51 @@ class IntentClassifier:
         self.id_to_intent = {idx: intent for intent, idx in self.intent_to_id.items()}
         self.num_labels = len(intents)
 
-    def prepare_dataset(self, data: list, max_length: int = 128) -> Dataset:
+    def _resolve_device(self) -> str:
+        if self.device is None:
+            import torch
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self.device
+
+    def _load_tokenizer(self):
         if not self.tokenizer:
+            from transformers import AutoTokenizer
+
             # IMPORTANT: resolve to absolute if local
             load_path = self._resolve_load_path(self.model_name)
             self.tokenizer = AutoTokenizer.from_pretrained(load_path)
+        return self.tokenizer
+
+    def load_pretokenized(self, filepaths: List[str], max_length: int = 128, cache_dir: str = "data/cache/tokenized"):
+        """Memory-mapped TokenizedCorpus per file (tokenized only when the file or tokenizer changed),
+        with labels mapped to a vocabulary built across all of them."""
+        from data_src.tokenized_corpus import TokenizedCorpus
+
+        tokenizer = self._load_tokenizer()
+        corpora = [
+            TokenizedCorpus.load_or_build(path, tokenizer, cache_dir=self._resolve_save_dir(cache_dir), max_length=max_length)
+            for path in filepaths
+        ]
+        self.build_vocab([{"intent": intent} for corpus in corpora for intent in corpus.intents])
+        return [corpus.set_label_map(self.intent_to_id) for corpus in corpora]
+
+    def prepare_dataset(self, data: list, max_length: int = 128, pad_to_max_length: bool = False) -> "Dataset":
+        """Tokenize examples. Unless ``pad_to_max_length``, they are left unpadded
+        (with a ``length`` column) for a collator to pad per batch."""
+        from datasets import Dataset
+
+        self._load_tokenizer()
 
         def tokenize_function(examples):
-            return self.tokenizer(
+            features = self.tokenizer(
                 examples["text"],
-                padding="max_length",
+                padding="max_length" if pad_to_max_length else False,
                 truncation=True,
                 max_length=max_length,
             )
+            # Read by the length-grouped sampler; dropped before batches reach the model
+            features["length"] = [len(ids) for ids in features["input_ids"]]
+            return features
 
         dataset = Dataset.from_dict(
             {
@@ -96,6 +178,8 @@ class IntentClassifier:
 
     # ---------- metrics ----------
     def compute_metrics(self, eval_pred):
+        from sklearn.metrics import precision_recall_fscore_support
+
         predictions, labels = eval_pred
         preds = np.argmax(predictions, axis=1)
         precision, recall, f1, _ = precision_recall_fscore_support(
@@ -113,23 +197,46 @@ class IntentClassifier:
         batch_size: int = 32,
         learning_rate: float = 2e-5,
         warmup_steps: int = 500,
+        max_length: int = 128,
+        dynamic_padding: bool = True,  # pad each batch to its longest example, not to max_length
+        group_by_length: bool = True,  # batch examples of similar length together
+        gradient_accumulation_steps: int = 1,  # effective batch = batch_size * this
+        pad_to_multiple_of: Optional[int] = None,  # e.g. 8 for tensor cores on GPU
+        pretokenized: bool = True,  # memory-map cached token ids instead of re-tokenizing the JSONL
+        cache_dir: str = "data/cache/tokenized",
     ):
         print("Loading training data...")
-        train_data = self.load_data(train_filepath)
-        val_data = self.load_data(val_filepath)
-        print(f"Train: {len(train_data)}, Val: {len(val_data)}")
-
-        self.build_vocab(train_data + val_data)
+        if pretokenized and dynamic_padding:
+            train_dataset, val_dataset = self.load_pretokenized([train_filepath, val_filepath], max_length, cache_dir)
+            lengths = train_dataset.lengths
+        else:
+            if pretokenized:
+                # The memmapped corpus stores unpadded ids; padding every example needs the tokenizer pass
+                print("⚠️  pretokenized=True needs dynamic_padding=True; re-tokenizing the JSONL instead")
+            train_data = self.load_data(train_filepath)
+            val_data = self.load_data(val_filepath)
+            self.build_vocab(train_data + val_data)
+            train_dataset = self.prepare_dataset(train_data, max_length, pad_to_max_length=not dynamic_padding)
+            val_dataset = self.prepare_dataset(val_data, max_length, pad_to_max_length=not dynamic_padding)
+            lengths = train_dataset["length"]
+        print(f"Train: {len(train_dataset)}, Val: {len(val_dataset)}")
         print(f"Intents: {self.num_labels}")
+        if dynamic_padding:
+            print(f"Dynamic padding: mean length {np.mean(lengths):.1f} tokens (max_length {max_length})")
+
+        from transformers import (
+            AutoModelForSequenceClassification,
+            DataCollatorWithPadding,
+            EarlyStoppingCallback,
+            Trainer,
+            TrainingArguments,
+        )
 
         # Resolve local or hub id for initialization
         load_path = self._resolve_load_path(self.model_name)
         self.model = AutoModelForSequenceClassification.from_pretrained(
             load_path, num_labels=self.num_labels
-        ).to(self.device)
-
-        train_dataset = self.prepare_dataset(train_data)
-        val_dataset = self.prepare_dataset(val_data)
+        ).to(self._resolve_device())
 
         # Save directory must be absolute to avoid cwd surprises
         abs_output = self._resolve_save_dir(output_dir)
@@ -141,6 +248,9 @@ class IntentClassifier:
             num_train_epochs=epochs,
             per_device_train_batch_size=batch_size,
             per_device_eval_batch_size=batch_size,
+            gradient_accumulation_steps=gradient_accumulation_steps,
+            group_by_length=group_by_length,
+            length_column_name="length",
             learning_rate=learning_rate,
             warmup_steps=warmup_steps,
             weight_decay=0.01,
@@ -154,18 +264,25 @@ class IntentClassifier:
             push_to_hub=False,
         )
 
-        trainer = Trainer(
+        class LengthAwareTrainer(Trainer):
+            def _get_train_sampler(self):
+                sampler = _precomputed_length_sampler(self.args, self.train_dataset)
+                return sampler if sampler is not None else super()._get_train_sampler()
+
+        trainer = LengthAwareTrainer(
             model=self.model,
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=val_dataset,
             tokenizer=self.tokenizer,
+            data_collator=DataCollatorWithPadding(self.tokenizer, pad_to_multiple_of=pad_to_multiple_of),
             compute_metrics=self.compute_metrics,
             callbacks=[EarlyStoppingCallback(early_stopping_patience=3)],
         )
 
         print("Training...")
         trainer.train()
+        self._model_changed()
 
         # Persist artifacts
         self.model.save_pretrained(abs_output)
@@ -176,10 +293,50 @@ class IntentClassifier:
         print(f"✓ Model saved to {abs_output}")
 
     # ---------- inference ----------
-    def load_model(self, model_path: str):
-        """Load trained model from local dir or hub id, resolving local relative paths."""
+    def load_model(
+        self,
+        model_path: str,
+        backend: str = "torch",
+        intra_op_threads: int = 0,
+        quantize: bool = False,
+        mmap_weights: bool = False,
+    ):
+        """Load trained model from local dir or hub id, resolving local relative paths.
+
+        backend="onnx" serves ``model.onnx`` from the model directory (see
+        models/export_model.py) through ONNX Runtime, which does not need torch.
+        quantize=True serves the dynamically quantized INT8 model, and is only
+        allowed once the accuracy gate in models/export_model.py has accepted it.
+        mmap_weights=True maps ``model.safetensors`` instead of copying it (torch
+        backend, CPU only), so processes loading the same model share its pages.
+        """
+        from transformers import AutoTokenizer
+
         load_path = self._resolve_load_path(model_path)
-        self.model = AutoModelForSequenceClassification.from_pretrained(load_path).to(self.device)
+        if quantize:
+            self._check_quantization_gate(Path(load_path), backend)
+
+        if backend == "onnx":
+            onnx_file = Path(load_path) / ONNX_MODEL_FILE
+            if not onnx_file.exists():
+                raise FileNotFoundError(
+                    f"{onnx_file} not found. Export it first: python models/export_model.py {model_path}"
+                )
+            self.model = OnnxSequenceClassifier(onnx_file, intra_op_threads=intra_op_threads)
+            self.device = "cpu"
+        elif backend == "torch" and mmap_weights and (Path(load_path) / SAFETENSORS_FILE).exists():
+            self.device = "cpu"
+            self.model = load_sequence_classifier_mmap(load_path)
+        elif backend == "torch":
+            from transformers import AutoModelForSequenceClassification
+            self.model = AutoModelForSequenceClassification.from_pretrained(load_path).to(self._resolve_device())
+        else:
+            raise ValueError(f"Unknown backend '{backend}'. Use 'torch' or 'onnx'.")
+
+        self.backend = backend
+        self.quantized = False
+        self.model_dir = Path(load_path)
+        self.intra_op_threads = intra_op_threads
         self.tokenizer = AutoTokenizer.from_pretrained(load_path)
 
         # Load mapping only if it's a local directory that has it
@@ -198,34 +355,120 @@ class IntentClassifier:
                     "or set intent_to_id before calling predict()."
                 )
 
-        self.model.eval()
-        print(f"✓ Model loaded from {load_path}")
+        if backend == "torch":
+            self.model.eval()
+        self._model_changed()
 
-    def predict(self, text: str, return_probs: bool = False):
-        if not self.model or not self.tokenizer:
+        if quantize:
+            self.quantize()
+        print(f"✓ Model loaded from {load_path} ({backend}{', int8' if self.quantized else ''})")
+
+    def quantize(self):
+        """Switch the loaded model to dynamic INT8 quantization for CPU serving.
+
+        torch: Linear layers are quantized in place with quantize_dynamic.
+        onnx: loads ``model.int8.onnx`` produced by models/export_model.py.
+        Does not apply the accuracy gate; use load_model(quantize=True) for that.
+        """
+        if not self.model:
             raise ValueError("Model not loaded. Call load_model() first.")
+        if self.quantized:
+            return
+
+        if self.backend == "onnx":
+            int8_file = self.model_dir / ONNX_INT8_MODEL_FILE
+            if not int8_file.exists():
+                raise FileNotFoundError(f"{int8_file} not found. Run models/export_model.py --quantize first.")
+            self.model = OnnxSequenceClassifier(int8_file, intra_op_threads=self.intra_op_threads)
+        else:
+            import torch
+            self.device = "cpu"
+            self.model = torch.quantization.quantize_dynamic(
+                self.model.to("cpu"), {torch.nn.Linear}, dtype=torch.qint8
+            )
 
-        inputs = self.tokenizer(
-            text, return_tensors="pt", truncation=True, max_length=128, padding=True
-        ).to(self.device)
+        self.quantized = True
+        self._model_changed()
 
-        with torch.no_grad():
-            logits = self.model(**inputs).logits
+    def _check_quantization_gate(self, model_dir: Path, backend: str):
+        report_file = model_dir / QUANTIZATION_REPORT_FILE
+        report = {}
+        if report_file.exists():
+            with open(report_file, "r") as f:
+                report = json.load(f).get(backend, {})
 
-        probs = torch.softmax(logits, dim=1)[0]
-        pred_idx = int(torch.argmax(probs))
-        pred_intent = self.id_to_intent[pred_idx]
-        confidence = float(probs[pred_idx])
+        if not report.get("accepted"):
+            raise ValueError(
+                f"INT8 {backend} model has not passed the accuracy gate ({report_file}). "
+                f"Run: python models/export_model.py {model_dir} --quantize --backend {backend}"
+            )
+        # An approval only covers the weights it was measured on; retraining invalidates it
+        if report.get("weights_sha256") != weights_fingerprint(model_dir, backend):
+            raise ValueError(
+                f"INT8 {backend} approval in {report_file} was given for different weights. "
+                f"Run: python models/export_model.py {model_dir} --quantize --backend {backend}"
+            )
+
+    def predict(self, text: str, return_probs: bool = False, encoding: Optional[Dict] = None):
+        encodings = [encoding] if encoding is not None else None
+        return self.predict_batch([text], return_probs=return_probs, encodings=encodings)[0]
+
+    def predict_batch(self, texts: List[str], return_probs: bool = False, encodings: Optional[List[Dict]] = None) -> List:
+        """Classify several texts in length-grouped batches; one predict() result per text.
+
+        With the prediction cache enabled only cache misses reach the model.
+        ``encodings`` are optional pre-computed tokenizer outputs (one per text)
+        so a message tokenized once by BankingTokenizer is not tokenized again.
+        """
+        if not self.model or not self.tokenizer:
+            raise ValueError("Model not loaded. Call load_model() first.")
+
+        if self.inferencer is None:
+            self.inferencer = Inferencer.from_classifier(self)
+
+        if self.cache is None:
+            results = self.inferencer.batch_predict(texts, top_k=3 if return_probs else 0, encodings=encodings)
+        else:
+            results = [self.cache.get(text) for text in texts]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                computed = self.inferencer.batch_predict(
+                    [texts[i] for i in misses],
+                    top_k=3,
+                    encodings=[encodings[i] for i in misses] if encodings is not None else None,
+                )
+                for i, result in zip(misses, computed):
+                    results[i] = result
+                    self.cache.put(texts[i], result)
 
         if return_probs:
-            top_k = torch.topk(probs, k=min(3, probs.numel()))
-            return {
-                "intent": pred_intent,
-                "confidence": confidence,
-                "top_k": [
-                    {"intent": self.id_to_intent[int(idx)], "score": float(score)}
-                    for idx, score in zip(top_k.indices, top_k.values)
-                ],
-            }
+            return [dict(r) for r in results]
+        return [(r["intent"], r["confidence"]) for r in results]
+
+    def warmup(self, lengths=WARMUP_LENGTHS, batch_sizes=(1, 32)) -> float:
+        """Run synthetic batches of each length/size so the first real requests
+        don't pay for lazy allocation and kernel selection. Returns seconds spent.
+
+        Bypasses the prediction cache.
+        """
+        import time
 
-        return pred_intent, confidence
+        if not self.model or not self.tokenizer:
+            raise ValueError("Model not loaded. Call load_model() first.")
+        if self.inferencer is None:
+            self.inferencer = Inferencer.from_classifier(self)
+
+        filler = self.tokenizer("check my account balance", add_special_tokens=False)["input_ids"]
+        start = time.perf_counter()
+        for length in lengths:
+            ids = self.tokenizer.build_inputs_with_special_tokens((filler * length)[:max(length - 2, 1)])
+            encoding = {"input_ids": ids, "attention_mask": [1] * len(ids)}
+            for batch_size in batch_sizes:
+                self.inferencer.batch_predict([""] * batch_size, encodings=[encoding] * batch_size)
+        return time.perf_counter() - start
+
+    def _model_changed(self):
+        """Rebuild the inference engine and drop predictions made by the previous model."""
+        self.inferencer = Inferencer.from_classifier(self) if self.tokenizer else None
+        if self.cache is not None:
+            self.cache.clear()
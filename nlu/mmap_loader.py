@@ -0,0 +1,73 @@
+"""Load safetensors weights as memory-mapped tensors.
+
+Parameters point straight into the OS page cache instead of being copied onto
+the heap, so loading is mostly page faults and every process that maps the
+same file shares one physical copy of the weights.
+"""
+import json
+import struct
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+SAFETENSORS_FILE = "model.safetensors"
+
+_NUMPY_DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "BF16": np.int16,  # reinterpreted as torch.bfloat16 below
+    "I64": np.int64,
+    "I32": np.int32,
+    "I16": np.int16,
+    "I8": np.int8,
+    "U8": np.uint8,
+    "BOOL": np.bool_,
+}
+
+def load_safetensors_mmap(path) -> Dict[str, "torch.Tensor"]:
+    """Map a .safetensors file and return its tensors without reading them into memory.
+
+    The mapping is copy-on-write: pages stay shared until something writes to
+    them (e.g. quantization or fine-tuning), which then gets a private copy.
+    """
+    import torch
+
+    path = Path(path)
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    header.pop("__metadata__", None)
+
+    data = np.memmap(path, dtype=np.uint8, mode="c", offset=8 + header_size)
+    tensors = {}
+    for name, info in header.items():
+        start, end = info["data_offsets"]
+        array = data[start:end].view(_NUMPY_DTYPES[info["dtype"]]).reshape(info["shape"])
+        tensor = torch.from_numpy(array)
+        tensors[name] = tensor.view(torch.bfloat16) if info["dtype"] == "BF16" else tensor
+    return tensors
+
+def load_sequence_classifier_mmap(model_dir) -> "PreTrainedModel":
+    """Build a sequence classifier from its config and assign mmap'd weights to it.
+
+    Skips the random weight init from_pretrained would do, and the copy of
+    every tensor into freshly allocated parameters.
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+    from transformers.modeling_utils import no_init_weights
+
+    model_dir = Path(model_dir)
+    weights_file = model_dir / SAFETENSORS_FILE
+    if not weights_file.exists():
+        raise FileNotFoundError(f"{weights_file} not found; memory-mapped loading needs safetensors weights")
+
+    with no_init_weights():
+        model = AutoModelForSequenceClassification.from_config(AutoConfig.from_pretrained(model_dir))
+
+    missing, _ = model.load_state_dict(load_safetensors_mmap(weights_file), strict=False, assign=True)
+    model.tie_weights()
+    if missing:
+        raise ValueError(f"{weights_file} is missing weights: {', '.join(missing[:5])}")
+    return model
@@ -1,27 +1,85 @@
 """Named Entity Recognition."""
-import spacy
-from typing import List, Dict
+from typing import Collection, List, Dict, Optional
+
+from .entity_rules import SPACY_LABEL_SLOTS, EntityRuleEngine
+from .tokenizer import load_spacy_pipeline
+
+# Slot types spaCy can contribute; any other slot comes from the rules alone
+SPACY_SLOTS = set(SPACY_LABEL_SLOTS.values())
 
 class NERExtractor:
-    def __init__(self, model_name: str = "en_core_web_sm"):
-        try:
-            self.nlp = spacy.load(model_name)
-        except OSError:
-            print(f"Downloading {model_name}...")
-            import os
-            os.system(f"python -m spacy download {model_name}")
-            self.nlp = spacy.load(model_name)
-
-    def extract_entities(self, text: str) -> List[Dict]:
-        doc = self.nlp(text)
-        entities = []
+    """Banking slot extraction: compiled rules first, spaCy NER only for what they leave.
+
+    With ``use_rules=False`` every message goes through spaCy, as before.
+    spaCy entities that map to a policy slot (see SPACY_LABEL_SLOTS) are
+    renamed to it; other labels are passed through unchanged.
+    """
+
+    def __init__(self, model_name: str = "en_core_web_sm", nlp=None, use_rules: bool = True, rules: Optional[EntityRuleEngine] = None):
+        self.model_name = model_name
+        self._nlp = nlp  # share BankingTokenizer.spacy_nlp to keep a single pipeline in memory
+        self.rules = (rules or EntityRuleEngine()) if use_rules else None
+
+        self.rule_only = 0   # messages answered without spaCy
+        self.spacy_calls = 0
+
+    @property
+    def nlp(self):
+        """NER-only spaCy pipeline, loaded on first use so importing/constructing stays cheap."""
+        if self._nlp is None:
+            self._nlp = load_spacy_pipeline(self.model_name)
+        return self._nlp
+
+    @property
+    def use_rules(self) -> bool:
+        return self.rules is not None
+
+    def extract_entities(self, text: str, doc=None, types: Optional[Collection[str]] = None) -> List[Dict]:
+        """Entities in text; pass an already-parsed ``doc`` to skip running spaCy again.
+
+        ``types`` limits the result to those slot types. spaCy is then only
+        run if a requested type is one it can find and the rules didn't.
+        """
+        entities = self.rules.extract(text) if self.rules else []
+
+        if doc is None and self.rules and not self._needs_spacy(text, entities, types):
+            self.rule_only += 1
+            return self._select(entities, types)
+
+        if doc is None:
+            doc = self.nlp(text)
+            self.spacy_calls += 1
 
         for ent in doc.ents:
+            if any(ent.start_char < e["end"] and e["start"] < ent.end_char for e in entities):
+                continue  # the rules already resolved this span
             entities.append({
                 "text": ent.text,
-                "type": ent.label_,
+                "type": SPACY_LABEL_SLOTS.get(ent.label_, ent.label_) if self.rules else ent.label_,
                 "start": ent.start_char,
                 "end": ent.end_char
             })
 
-        return entities
+        return self._select(sorted(entities, key=lambda e: e["start"]), types)
+
+    def _needs_spacy(self, text: str, entities: List[Dict], types: Optional[Collection[str]]) -> bool:
+        if types is not None:
+            found = {e["type"] for e in entities}
+            if not any(t in SPACY_SLOTS and t not in found for t in types):
+                return False
+        return self.rules.needs_ner(text, entities)
+
+    @staticmethod
+    def _select(entities: List[Dict], types: Optional[Collection[str]]) -> List[Dict]:
+        if types is None:
+            return entities
+        return [e for e in entities if SPACY_LABEL_SLOTS.get(e["type"], e["type"]) in types]
+
+    def get_summary(self) -> Dict:
+        total = self.rule_only + self.spacy_calls
+        return {
+            "rules_enabled": self.use_rules,
+            "rule_only": self.rule_only,
+            "spacy_calls": self.spacy_calls,
+            "rule_only_rate": self.rule_only / total if total else 0.0,
+        }
@@ -0,0 +1,39 @@
+"""ONNX Runtime backend for the intent classifier."""
+from collections import namedtuple
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+
+OnnxOutput = namedtuple("OnnxOutput", ["logits"])
+
+
+class OnnxSequenceClassifier:
+    """Run an exported sequence classifier through ONNX Runtime.
+
+    Mirrors the ``model(**inputs).logits`` call convention of the transformers
+    model so it can stand in for it inside Inferencer, without importing torch.
+    """
+
+    def __init__(self, onnx_path: Union[str, Path], intra_op_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError:  # optional: only needed for backend="onnx"
+            raise ImportError("onnxruntime is required for the ONNX backend: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.onnx_path = str(onnx_path)
+        self.session = ort.InferenceSession(self.onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, **inputs) -> OnnxOutput:
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in self.input_names}
+        logits = self.session.run(["logits"], feed)[0]
+        return OnnxOutput(logits=logits)
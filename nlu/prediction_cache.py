@@ -0,0 +1,80 @@
+"""Bounded LRU cache for intent predictions."""
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+
+from data_src.pii_handler import PIIRedactor
+
+_WHITESPACE = re.compile(r"\s+")
+_PII = re.compile("|".join(f"(?:{p})" for p in PIIRedactor.PATTERNS.values()))
+
+
+class PredictionCache:
+    """LRU cache of predictions keyed on normalized utterance text.
+
+    Keys are expected to be PII-redacted already (the API redacts before
+    classifying). As a guard, text that still matches a PII pattern is never
+    stored, so the cache cannot end up holding raw PII.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase and collapse whitespace (the intent model is uncased)."""
+        return _WHITESPACE.sub(" ", text.strip().lower())
+
+    def get(self, text: str):
+        key = self.normalize(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl_seconds is None or time.monotonic() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, text: str, value):
+        if _PII.search(text):
+            return
+
+        key = self.normalize(text)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_summary(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
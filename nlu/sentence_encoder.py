@@ -0,0 +1,74 @@
+"""Sentence embeddings from the DistilBERT encoder."""
+from typing import List, Optional
+
+import numpy as np
+
+from .inference import pad_batch
+
+class SentenceEncoder:
+    """Mean-pooled, L2-normalized sentence embeddings (float32).
+
+    Pass an already loaded transformer as ``model`` (e.g. the intent
+    classifier's ``model.base_model``) to reuse its weights instead of loading
+    a second copy; otherwise ``model_name`` is loaded on first use.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "distilbert-base-uncased",
+        model=None,
+        tokenizer=None,
+        max_length: int = 64,
+        batch_size: int = 64,
+    ):
+        self.model_name = model_name
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self._model = model
+        self._tokenizer = tokenizer
+
+    @property
+    def model(self):
+        if self._model is None:
+            from transformers import AutoModel
+            self._model = AutoModel.from_pretrained(self.model_name).eval()
+        return self._model
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
+
+    @property
+    def dim(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 matrix with unit-norm rows."""
+        import torch
+
+        batch_size = batch_size or self.batch_size
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        features = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)
+        # Group by length so each batch pads only to its own longest text
+        order = sorted(range(len(texts)), key=lambda i: len(features["input_ids"][i]))
+
+        with torch.no_grad():
+            for start in range(0, len(order), batch_size):
+                indices = order[start:start + batch_size]
+                batch = {key: [features[key][i] for i in indices] for key in ("input_ids", "attention_mask")}
+                padded = {k: torch.from_numpy(v) for k, v in pad_batch(batch, self.tokenizer.pad_token_id).items()}
+
+                hidden = self.model(**padded).last_hidden_state
+                mask = padded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+                embeddings[indices] = pooled.float().numpy()
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings /= np.maximum(norms, 1e-12)
+        return embeddings
@@ -1,17 +1,94 @@
 """Tokenization wrapper for multi-layer token processing."""
-import spacy
-from transformers import AutoTokenizer
+from typing import Dict, List, Sequence
+
+# spaCy is only used for entity recognition, so everything else is switched off
+SPACY_KEEP_COMPONENTS = ("ner",)
+
+def load_spacy_pipeline(model_name: str = "en_core_web_sm", keep: Sequence[str] = SPACY_KEEP_COMPONENTS):
+    """Load a spaCy pipeline with every component not needed by ``keep`` disabled.
+
+    A shared ``tok2vec`` stays enabled only if one of the kept components
+    listens to it (in en_core_web_sm NER has its own embedding layer).
+    """
+    import spacy
+    try:
+        nlp = spacy.load(model_name)
+    except OSError:
+        print(f"Downloading {model_name}...")
+        import os
+        os.system(f"python -m spacy download {model_name}")
+        nlp = spacy.load(model_name)
+
+    enabled = [name for name in nlp.pipe_names if name in keep]
+    if "tok2vec" in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+        if any(name in keep for name in listeners):
+            enabled.insert(0, "tok2vec")
+    nlp.select_pipes(enable=enabled)
+    return nlp
 
 class BankingTokenizer:
-    """Handle both spaCy and BERT tokenization."""
+    """Handle both spaCy and BERT tokenization.
+
+    One ``tokenize`` call produces everything a turn needs: the spaCy ``doc``
+    for NER and the BERT ``encoding`` for intent classification, so neither
+    stage re-tokenizes the message. Pass the intent model's tokenizer as
+    ``bert_tokenizer`` so the ids match what the classifier was trained on.
+    Both pipelines are loaded on first use rather than at import/construction.
+    """
+
+    def __init__(
+        self,
+        model_name="distilbert-base-uncased",
+        spacy_model: str = "en_core_web_sm",
+        bert_tokenizer=None,
+        max_length: int = 128,
+    ):
+        self.model_name = model_name
+        self.spacy_model = spacy_model
+        self.max_length = max_length
+        self._spacy_nlp = None
+        self._bert_tokenizer = bert_tokenizer
 
-    def __init__(self, model_name="distilbert-base-uncased"):
-        self.spacy_nlp = spacy.load("en_core_web_sm")
-        self.bert_tokenizer = AutoTokenizer.from_pretrained(model_name)
+    @property
+    def spacy_nlp(self):
+        if self._spacy_nlp is None:
+            self._spacy_nlp = load_spacy_pipeline(self.spacy_model)
+        return self._spacy_nlp
 
-    def tokenize(self, text: str) -> dict:
+    @property
+    def bert_tokenizer(self):
+        if self._bert_tokenizer is None:
+            from transformers import AutoTokenizer
+            self._bert_tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._bert_tokenizer
+
+    def tokenize(self, text: str, parse: bool = True) -> dict:
         """Tokenize text using both spaCy and BERT."""
-        doc = self.spacy_nlp(text)
-        spacy_tokens = [token.text for token in doc]
-        bert_tokens = self.bert_tokenizer.tokenize(text)
-        return {"spacy": spacy_tokens, "bert": bert_tokens, "doc": doc}
+        return self.tokenize_batch([text], parse=parse)[0]
+
+    def tokenize_batch(self, texts: List[str], batch_size: int = 64, parse: bool = True) -> List[Dict]:
+        """Tokenize several texts with ``nlp.pipe`` and a single BERT tokenizer call.
+
+        Each result has ``spacy`` and ``bert`` token lists, the spaCy ``doc``
+        and an unpadded ``encoding`` (``input_ids`` / ``attention_mask``) that
+        can be passed to ``IntentClassifier.predict_batch(encodings=...)``.
+        With ``parse=False`` spaCy is skipped and ``spacy``/``doc`` are None.
+        """
+        if not texts:
+            return []
+
+        docs = self.spacy_nlp.pipe(texts, batch_size=batch_size) if parse else [None] * len(texts)
+        features = self.bert_tokenizer(list(texts), truncation=True, max_length=self.max_length)
+
+        results = []
+        for i, doc in enumerate(docs):
+            encoding = {key: features[key][i] for key in features.keys()}
+            results.append({
+                "spacy": [token.text for token in doc] if doc is not None else None,
+                # Same tokens as bert_tokenizer.tokenize(text): drop [CLS] ... [SEP]
+                "bert": self.bert_tokenizer.convert_ids_to_tokens(encoding["input_ids"][1:-1]),
+                "doc": doc,
+                "encoding": encoding,
+            })
+        return results
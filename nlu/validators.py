@@ -1,7 +1,12 @@
 """Entity validators."""
 import re
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, List
+
+DEFAULT_PRODUCT_TYPES = ["checking", "savings", "credit_card", "loan"]
+
+# Spelling variants mapped onto entities.yaml PRODUCT_TYPE values
+ACCOUNT_SYNONYMS = {"chequing": "checking", "saving": "savings"}
 
 class EntityValidator:
     @staticmethod
@@ -12,28 +17,59 @@ class EntityValidator:
         return None
 
     @staticmethod
-    def validate_card_last4(text: str) -> Optional[str]:
-        match = re.search(r"(\d{4})", text)
+    def validate_card_last4(text: str, full_match: bool = False) -> Optional[str]:
+        if full_match:
+            match = re.fullmatch(r"\**(\d{4})", text.strip())
+        else:
+            match = re.search(r"(\d{4})", text)
         if match:
             return match.group(1)
         return None
 
     @staticmethod
-    def parse_date_range(text: str) -> Optional[Dict]:
-        text_lower = text.lower()
+    def parse_account_type(text: str, product_types: Optional[List[str]] = None, full_match: bool = False) -> Optional[str]:
+        """The one product type named in text ("savings", "my credit card account"), else None.
+
+        With ``full_match`` the text must be nothing but the name ("savings", "credit card").
+        """
+        product_types = product_types or DEFAULT_PRODUCT_TYPES
+        names = {name.replace("_", " "): name for name in product_types}
+        names.update({k: v for k, v in ACCOUNT_SYNONYMS.items() if v in product_types})
+
+        text_lower = text.lower().strip()
+        if full_match:
+            for name, value in names.items():
+                if re.fullmatch(rf"{re.escape(name)}s?", text_lower):
+                    return value
+            return None
+        found = {value for name, value in names.items() if re.search(rf"\b{re.escape(name)}s?\b", text_lower)}
+        if len(found) == 1:
+            return found.pop()
+        return None
+
+    @staticmethod
+    def parse_date_range(text: str, full_match: bool = False) -> Optional[Dict]:
+        text_lower = text.lower().strip()
+        if full_match:
+            # The phrase or the range must be the whole text
+            contains = lambda phrase: text_lower == phrase
+            search = re.fullmatch
+        else:
+            contains = lambda phrase: phrase in text_lower
+            search = re.search
 
-        if "last week" in text_lower:
+        if contains("last week"):
             end = datetime.now()
             start = end - timedelta(days=7)
             return {"start": start.isoformat(), "end": end.isoformat()}
 
-        if "last month" in text_lower:
+        if contains("last month"):
             end = datetime.now()
             start = end - timedelta(days=30)
             return {"start": start.isoformat(), "end": end.isoformat()}
 
         pattern = r"(\d{4}-\d{2}-\d{2})\s*(?:to|through|-)\s*(\d{4}-\d{2}-\d{2})"
-        match = re.search(pattern, text)
+        match = search(pattern, text.strip())
         if match:
             try:
                 start = datetime.strptime(match.group(1), "%Y-%m-%d")
@@ -45,13 +81,21 @@ class EntityValidator:
         return None
 
     @staticmethod
-    def parse_amount(text: str) -> Optional[Dict]:
-        pattern = r"([$€¥£]?)\s*(\d+\.?\d*)\s*([A-Z]{3})?"
-        match = re.search(pattern, text)
+    def parse_amount(text: str, full_match: bool = False) -> Optional[Dict]:
+        """``{"amount", "currency"}`` from "$1,250.50", "500 EUR" or "75".
+
+        With ``full_match`` the text must be nothing but the amount.
+        """
+        # Thousands separators only in groups of three, so "1,000" is 1000 but "3,4" stops at 3
+        number = r"(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+        if full_match:
+            match = re.fullmatch(rf"([$€¥£]?)\s*{number}(?:\s*(usd|eur|gbp|jpy))?", text.strip(), re.I)
+        else:
+            match = re.search(rf"([$€¥£]?)\s*{number}\s*([A-Z]{{3}})?", text)
         if match:
             symbol = match.group(1)
-            amount_str = match.group(2)
-            currency = match.group(3)
+            amount_str = match.group(2).replace(",", "")
+            currency = match.group(3) and match.group(3).upper()
 
             if not currency:
                 currency_map = {"$": "USD", "€": "EUR", "¥": "JPY", "£": "GBP"}
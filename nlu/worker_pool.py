@@ -0,0 +1,309 @@
+"""Multi-process intent inference with per-worker core pinning."""
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .prediction_cache import PredictionCache
+
+
+def available_cores() -> List[int]:
+    """CPU ids this process may run on (respects cgroup/taskset limits where the OS exposes them)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def _worker_main(
+    conn, model_path: str, cores: List[int], threads: int, backend: str, quantize: bool, warmup: bool, warmup_shapes: Dict
+):
+    """Worker process: pin, configure threads, load and warm up the model, then serve batches until None arrives."""
+    # Must be set before torch / onnxruntime create their thread pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    try:
+        if backend == "torch":
+            import torch
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+
+        from .intent_classifier import IntentClassifier
+        classifier = IntentClassifier(device="cpu")
+        classifier.load_model(model_path, backend=backend, intra_op_threads=threads, quantize=quantize, mmap_weights=True)
+        if warmup:
+            classifier.warmup(**warmup_shapes)
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+        return
+
+    conn.send(("ready", os.getpid()))
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        texts, encodings = message
+        try:
+            conn.send(("ok", classifier.inferencer.batch_predict(texts, top_k=3, encodings=encodings)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class InferenceWorkerPool:
+    """Pool of intent-model processes, each pinned to its own slice of cores.
+
+    Workers are spawned (not forked) and load the model with memory-mapped
+    safetensors weights, so N workers share one copy of the weights in the
+    page cache. Requests go to an idle worker over a ``multiprocessing.Pipe``.
+
+    Exposes the IntentClassifier predict / predict_batch interface and is
+    thread-safe: up to ``num_workers`` batches run in parallel, e.g. from a
+    BatchScheduler with ``max_concurrent_batches=num_workers``. The prediction
+    cache, if enabled, lives in the parent process.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        num_workers: int = 0,  # 0 = as many as the available cores allow
+        threads_per_worker: int = 4,
+        backend: str = "torch",
+        quantize: bool = False,
+        pin_cores: bool = True,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        warmup: bool = True,  # workers warm up before reporting ready
+        warmup_lengths: Optional[List[int]] = None,  # None = IntentClassifier.warmup defaults
+        warmup_batch_sizes: Optional[List[int]] = None,
+        request_timeout: float = 30.0,  # max seconds to wait for an idle worker, and for a batch result
+        startup_timeout: float = 300.0,  # max seconds for a (re)spawned worker to load the model
+    ):
+        cores = available_cores()
+        self.threads_per_worker = max(1, min(threads_per_worker, len(cores)))
+        self.num_workers = num_workers or max(1, len(cores) // self.threads_per_worker)
+        self.model_path = model_path
+        self.backend = backend
+        self.quantize = quantize
+        self.pin_cores = pin_cores
+        self.warmup_workers = warmup
+        # Same shapes the in-process classifier is warmed up with
+        self.warmup_shapes = {}
+        if warmup_lengths is not None:
+            self.warmup_shapes["lengths"] = tuple(warmup_lengths)
+        if warmup_batch_sizes is not None:
+            self.warmup_shapes["batch_sizes"] = tuple(warmup_batch_sizes)
+        self.request_timeout = request_timeout
+        self.startup_timeout = startup_timeout
+        self.cache = PredictionCache(cache_size, cache_ttl) if cache_size else None
+
+        self.tokenizer = None
+        self.workers: List[Dict] = []
+        self._idle: "queue.Queue[Dict]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._respawning = 0  # replacement workers still loading
+        self._closed = False
+        self.restarts = 0
+
+    def _core_slices(self) -> List[List[int]]:
+        if not self.pin_cores:
+            return [[] for _ in range(self.num_workers)]
+        cores = available_cores()
+        t = self.threads_per_worker
+        # Wrap around when there are more workers than core slices
+        return [[cores[(i * t + j) % len(cores)] for j in range(t)] for i in range(self.num_workers)]
+
+    def start(self, timeout: Optional[float] = None):
+        """Spawn the workers and block until every one has loaded (and warmed up) the model."""
+        from transformers import AutoTokenizer
+        from .intent_classifier import resolve_load_path
+
+        if self.workers:
+            return
+        # Resolve once, as IntentClassifier.load_model does, so workers and tokenizer don't depend on the cwd
+        self.model_path = resolve_load_path(self.model_path)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        self._closed = False
+
+        timeout = self.startup_timeout if timeout is None else timeout
+        workers = [self._spawn(cores) for cores in self._core_slices()]
+        self.workers = list(workers)
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            try:
+                self._await_ready(worker, max(0.0, deadline - time.monotonic()))
+            except Exception:
+                self.close()
+                raise
+            self._idle.put(worker)
+
+        print(f"✓ Started {self.num_workers} inference workers x {self.threads_per_worker} threads")
+
+    def _spawn(self, cores: List[int]) -> Dict:
+        ctx = mp.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_worker_main,
+            args=(
+                child_conn, self.model_path, cores, self.threads_per_worker,
+                self.backend, self.quantize, self.warmup_workers, self.warmup_shapes,
+            ),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return {"process": process, "conn": parent_conn, "cores": cores, "batches": 0, "texts": 0}
+
+    @staticmethod
+    def _await_ready(worker: Dict, timeout: float):
+        if not worker["conn"].poll(timeout):
+            raise TimeoutError(f"Inference worker did not load the model within {timeout:.0f}s")
+        try:
+            status, detail = worker["conn"].recv()
+        except (EOFError, OSError):
+            raise RuntimeError(f"Inference worker exited while loading (exit code {worker['process'].exitcode})")
+        if status != "ready":
+            raise RuntimeError(f"Inference worker failed to start: {detail}")
+        worker["pid"] = detail
+
+    @staticmethod
+    def _stop_process(worker: Dict):
+        if worker["process"].is_alive():
+            worker["process"].terminate()
+        worker["process"].join(timeout=5)
+        worker["conn"].close()
+
+    def _replace(self, worker: Dict, reason: str):
+        """Drop a dead or hung worker and load a replacement on the same cores in the background."""
+        print(f"⚠️  Inference worker {worker.get('pid')} {reason}; restarting it")
+        self._stop_process(worker)
+        with self._lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
+            if self._closed:
+                return
+            self._respawning += 1
+            self.restarts += 1
+        threading.Thread(target=self._respawn, args=(worker["cores"],), daemon=True).start()
+
+    def _respawn(self, cores: List[int]):
+        replacement = None
+        try:
+            replacement = self._spawn(cores)
+            self._await_ready(replacement, self.startup_timeout)
+        except Exception as e:
+            print(f"❌ Could not restart inference worker: {e}")
+            if replacement is not None:
+                self._stop_process(replacement)
+            replacement = None
+        with self._lock:
+            self._respawning -= 1
+            if replacement is not None and self._closed:
+                self._stop_process(replacement)
+                replacement = None
+            if replacement is not None:
+                self.workers.append(replacement)
+        if replacement is not None:
+            self._idle.put(replacement)
+
+    def close(self):
+        """Stop all workers."""
+        with self._lock:
+            self._closed = True
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            try:
+                worker["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in workers:
+            worker["process"].join(timeout=5)
+            if worker["process"].is_alive():
+                worker["process"].terminate()
+            worker["conn"].close()
+        self._idle = queue.Queue()
+
+    def _next_idle(self) -> Dict:
+        """An idle, live worker; fails fast once no worker is left or coming back."""
+        deadline = time.monotonic() + self.request_timeout
+        while True:
+            with self._lock:
+                if not self.workers and not self._respawning:
+                    raise RuntimeError("No live inference workers")
+            try:
+                # Short waits so a pool that loses its last worker meanwhile is noticed
+                worker = self._idle.get(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"No inference worker became idle within {self.request_timeout:.0f}s")
+                continue
+            if worker["process"].is_alive():
+                return worker
+            self._replace(worker, "exited")
+
+    def _dispatch(self, texts: List[str], encodings: Optional[List[Dict]]) -> List[Dict]:
+        """Run one batch on the next idle worker (waits up to ``request_timeout`` while all are busy)."""
+        if self.tokenizer is None:
+            raise ValueError("Worker pool not started. Call start() first.")
+
+        worker = self._next_idle()
+        try:
+            worker["conn"].send((texts, encodings))
+            if not worker["conn"].poll(self.request_timeout):
+                self._replace(worker, f"did not answer within {self.request_timeout:.0f}s")
+                raise TimeoutError(f"Inference worker {worker.get('pid')} timed out")
+            status, payload = worker["conn"].recv()
+        except (EOFError, OSError) as e:
+            self._replace(worker, "died")
+            raise RuntimeError(f"Inference worker {worker.get('pid')} died: {e}") from e
+
+        with self._lock:
+            worker["batches"] += 1
+            worker["texts"] += len(texts)
+        self._idle.put(worker)
+
+        if status != "ok":
+            raise RuntimeError(f"Inference worker {worker.get('pid')} failed: {payload}")
+        return payload
+
+    def predict(self, text: str, return_probs: bool = False, encoding: Optional[Dict] = None):
+        encodings = [encoding] if encoding is not None else None
+        return self.predict_batch([text], return_probs=return_probs, encodings=encodings)[0]
+
+    def predict_batch(self, texts: List[str], return_probs: bool = False, encodings: Optional[List[Dict]] = None) -> List:
+        """Same result format as IntentClassifier.predict_batch."""
+        if not texts:
+            return []
+
+        if self.cache is None:
+            results = self._dispatch(list(texts), encodings)
+        else:
+            results = [self.cache.get(text) for text in texts]
+            misses = [i for i, result in enumerate(results) if result is None]
+            if misses:
+                computed = self._dispatch(
+                    [texts[i] for i in misses],
+                    [encodings[i] for i in misses] if encodings is not None else None,
+                )
+                for i, result in zip(misses, computed):
+                    results[i] = result
+                    self.cache.put(texts[i], result)
+
+        if return_probs:
+            return [dict(r) for r in results]
+        return [(r["intent"], r["confidence"]) for r in results]
+
+    def get_summary(self) -> Dict:
+        return {
+            "num_workers": len(self.workers),
+            "threads_per_worker": self.threads_per_worker,
+            "idle": self._idle.qsize(),
+            "restarting": self._respawning,
+            "restarts": self.restarts,
+            "workers": [
+                {"pid": w.get("pid"), "cores": w["cores"], "batches": w["batches"], "texts": w["texts"]}
+                for w in self.workers
+            ],
+        }
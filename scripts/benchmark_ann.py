@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Recall@k and latency of the IVF-PQ index against exact search."""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from tools.ann_index import IVFPQIndex
+
+def synthetic_embeddings(n: int, dim: int, n_clusters: int = 1000, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, a rough stand-in for sentence embeddings of a topical corpus."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, n_clusters, n)] + 0.5 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    return float(np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)]))
+
+def run_benchmark(vectors: np.ndarray, n_queries: int, k: int, n_lists: int, n_subvectors: int, nprobes, rerank: int):
+    print("\n" + "="*60)
+    print("ANN BENCHMARK: IVF-PQ vs. exact search")
+    print("="*60)
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), n_queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    start = time.perf_counter()
+    exact = exact_top_k(vectors, queries, k)
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    start = time.perf_counter()
+    index = IVFPQIndex(vectors.shape[1], n_lists=n_lists, n_subvectors=n_subvectors).train(vectors)
+    index.add(vectors)
+    build_s = time.perf_counter() - start
+
+    print(f"Vectors: {len(vectors)} x {vectors.shape[1]}, queries: {n_queries}, k={k}")
+    print(f"Index: {n_lists} lists, {n_subvectors} bytes/vector, built in {build_s:.1f}s")
+    print(f"Memory: {index.memory_bytes() / 1e6:.1f} MB (vs. {vectors.nbytes / 1e6:.1f} MB float32)")
+    print(f"Exact search: {exact_ms:.2f} ms/query\n")
+    print(f"{'nprobe':>6} {'rerank':>6} {'recall@k':>9} {'ms/query':>9}")
+
+    results = []
+    for nprobe in nprobes:
+        for rr in sorted({0, rerank}):
+            start = time.perf_counter()
+            _, ids = index.search(queries, k=k, nprobe=nprobe, rerank=rr, vectors=vectors if rr else None)
+            ms = (time.perf_counter() - start) * 1000 / n_queries
+            recall = recall_at_k(ids, exact)
+            results.append({"nprobe": nprobe, "rerank": rr, "recall_at_k": recall, "ms_per_query": ms})
+            print(f"{nprobe:>6} {rr:>6} {recall:>9.3f} {ms:>9.2f}")
+
+    return {"n": len(vectors), "dim": int(vectors.shape[1]), "k": k, "exact_ms_per_query": exact_ms, "results": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--embeddings", help=".npy matrix of unit-norm embeddings (default: synthetic)")
+    parser.add_argument("--n", type=int, default=100000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=128, help="synthetic embedding size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-lists", type=int, default=1024)
+    parser.add_argument("--n-subvectors", type=int, default=32)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--rerank", type=int, default=100, help="candidates re-scored exactly (0 = off)")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.load(args.embeddings, mmap_mode="r").astype(np.float32)
+    else:
+        vectors = synthetic_embeddings(args.n, args.dim)
+
+    report = run_benchmark(vectors, args.queries, args.k, args.n_lists, args.n_subvectors, args.nprobe, args.rerank)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""Micro-benchmark each hot-path stage and fail on regressions against a baseline.
+
+Stages run on fixed inputs built from data_src/dialogue_templates.py and
+report ops/sec and p50/p95/p99 latency. Results are saved as JSON; with a
+baseline present, a stage whose p50 latency or throughput is worse than the
+baseline by more than ``--tolerance`` fails the run (exit code 1). Noisy
+stages can get their own limit under ``"tolerances"`` in the baseline file.
+
+    python scripts/benchmark_stages.py --save-baseline   # on the reference commit
+    python scripts/benchmark_stages.py                   # on a candidate
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.config import PROJECT_ROOT, load_config
+from data_src.dialogue_templates import DIALOGUE_TEMPLATES
+
+STAGES = [
+    "pii_redact", "intent_predict", "intent_batch", "ner_extract",
+    "policy_select", "backend_query", "process_message",
+]
+
+# Appended to template utterances so redaction and entity rules have something to find
+PII_SUFFIXES = [
+    "",
+    " from my card 4111 1111 1111 1234",
+    " my account is 1234567890",
+    " call me at 555-123-4567",
+    " email jane.doe@example.com",
+]
+
+BATCH_SIZE = 32
+
+def build_inputs() -> List[Dict]:
+    """Deterministic (intent, text) pairs: every template utterance with each PII suffix."""
+    inputs = []
+    for intent, templates in DIALOGUE_TEMPLATES.items():
+        for text in templates["single_turn"]:
+            for suffix in PII_SUFFIXES:
+                inputs.append({"intent": intent, "text": text + suffix})
+    return inputs
+
+def measure(fn: Callable[[int], None], n_inputs: int, min_time: float, min_ops: int, warmup: int) -> Dict:
+    """Call ``fn(i)`` cycling over input indices; per-call latency percentiles and ops/sec."""
+    for i in range(warmup):
+        fn(i % n_inputs)
+
+    samples_ns = []
+    started = time.perf_counter()
+    i = 0
+    while i < min_ops or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter_ns()
+        fn(i % n_inputs)
+        samples_ns.append(time.perf_counter_ns() - t0)
+        i += 1
+
+    samples_ms = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    return {
+        "ops": len(samples_ns),
+        "ops_per_sec": len(samples_ns) / (samples_ms.sum() / 1000),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+    }
+
+def build_stages(inputs: List[Dict], model_dir: str, spacy_model: str, backend: str) -> Dict[str, Optional[Callable]]:
+    """Stage name -> callable(i); None (with a printed reason) when its model can't be loaded."""
+    from data_src.pii_handler import PIIRedactor
+    from dialogue.state_machine import DialogueContext, DialogueManager, DialoguePolicy
+    from tools.bank_api_adapter import BankingAPIAdapter
+
+    texts = [record["text"] for record in inputs]
+    redactor = PIIRedactor()
+    policy = DialoguePolicy()
+    adapter = BankingAPIAdapter()
+    full_slots = {
+        "account_type": "checking", "source_account": "checking", "target_account": "savings",
+        "amount": {"amount": 50.0, "currency": "USD"}, "card_last4": "1234", "date_range": "last week",
+    }
+    # Alternate between a context that still needs slots and one that has them all
+    contexts = [
+        DialogueContext(session_id="bench-empty"),
+        DialogueContext(session_id="bench-full", slots=dict(full_slots)),
+    ]
+
+    stages: Dict[str, Optional[Callable]] = {
+        "pii_redact": lambda i: redactor.redact(texts[i]),
+        "policy_select": lambda i: policy.select_action(inputs[i]["intent"], 0.9, contexts[i % 2]),
+        "backend_query": lambda i: adapter.query(inputs[i]["intent"], full_slots),
+    }
+
+    classifier = None
+    try:
+        from nlu.intent_classifier import IntentClassifier
+        classifier = IntentClassifier(device="cpu")  # no prediction cache: measure the model
+        classifier.load_model(model_dir, backend=backend)
+        batches = [texts[start:start + BATCH_SIZE] for start in range(0, len(texts), BATCH_SIZE)]
+        stages["intent_predict"] = lambda i: classifier.predict(texts[i])
+        stages["intent_batch"] = lambda i: classifier.predict_batch(batches[i % len(batches)])
+    except Exception as e:
+        print(f"⚠️  Intent stages skipped: {e}")
+        classifier = None
+        stages["intent_predict"] = stages["intent_batch"] = None
+
+    ner = None
+    try:
+        from nlu.ner_extractor import NERExtractor
+        ner = NERExtractor(spacy_model, use_rules=True)
+        ner.nlp  # load spaCy now, not inside the first timed call
+        stages["ner_extract"] = lambda i: ner.extract_entities(texts[i])
+    except Exception as e:
+        print(f"⚠️  NER stage skipped: {e}")
+        ner = None
+        stages["ner_extract"] = None
+
+    if classifier is not None:
+        manager = DialogueManager(classifier, ner_extractor=ner, backend_adapter=adapter)
+        # A fixed set of sessions so history and slots stay bounded across iterations
+        stages["process_message"] = lambda i: manager.process_message(f"bench-{i % 16}", texts[i])
+    else:
+        stages["process_message"] = None
+    return stages
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Stages whose p50 latency rose, or ops/sec fell, by more than ``tolerance`` (a fraction),
+    and baseline stages this run had to skip (e.g. their model failed to load)."""
+    regressions = []
+    for stage in results.get("skipped", []):
+        if stage in baseline.get("stages", {}):
+            regressions.append(f"{stage}: skipped in this run but measured in the baseline (see the load error above)")
+    for stage, current in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        stage_tolerance = baseline.get("tolerances", {}).get(stage, tolerance)
+        slower = current["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        fewer = 1 - current["ops_per_sec"] / base["ops_per_sec"] if base["ops_per_sec"] else 0.0
+        if slower > stage_tolerance or fewer > stage_tolerance:
+            regressions.append(
+                f"{stage}: p50 {base['p50_ms']:.3f} → {current['p50_ms']:.3f} ms ({slower:+.0%}), "
+                f"{base['ops_per_sec']:.0f} → {current['ops_per_sec']:.0f} ops/sec (tolerance {stage_tolerance:.0%})"
+            )
+    return regressions
+
+def environment() -> Dict:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def main() -> int:
+    config = load_config()
+    evaluation_dir = PROJECT_ROOT / config.get("data", {}).get("evaluation_dir", "data/evaluation_results")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--model", default=config.get("models", {}).get("intent_classifier", "models/distilbert_intent"))
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=config.get("serving", {}).get("backend", "torch"))
+    parser.add_argument("--spacy-model", default=config.get("serving", {}).get("ner", {}).get("spacy_model", "en_core_web_sm"))
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds measured per stage")
+    parser.add_argument("--min-ops", type=int, default=50, help="calls measured per stage at least")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed calls per stage")
+    parser.add_argument("--output", default=str(evaluation_dir / "benchmark_stages.json"))
+    parser.add_argument("--baseline", default=str(evaluation_dir / "benchmark_stages_baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown per stage (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("PER-STAGE MICRO-BENCHMARKS")
+    print("="*60)
+
+    inputs = build_inputs()
+    stages = build_stages(inputs, args.model, args.spacy_model, args.backend)
+    print(f"Inputs: {len(inputs)} synthetic utterances\n")
+    print(f"{'stage':<18} {'ops/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+
+    results = {"environment": environment(), "n_inputs": len(inputs), "batch_size": BATCH_SIZE, "stages": {}, "skipped": []}
+    for stage in args.stages:
+        fn = stages.get(stage)
+        if fn is None:
+            print(f"{stage:<18} {'skipped':>10}")
+            results["skipped"].append(stage)
+            continue
+        stats = measure(fn, len(inputs), args.min_time, args.min_ops, args.warmup)
+        results["stages"][stage] = stats
+        print(f"{stage:<18} {stats['ops_per_sec']:>10.1f} {stats['p50_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline = dict(results)
+        if baseline_path.exists():
+            # Keep per-stage tolerances added by hand to the previous baseline
+            with open(baseline_path, "r") as f:
+                tolerances = json.load(f).get("tolerances")
+            if tolerances:
+                baseline["tolerances"] = tolerances
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"✓ Baseline saved to {baseline_path}")
+        if results["skipped"]:
+            print(f"⚠️  Not in the baseline (skipped): {', '.join(results['skipped'])}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+        return 0
+
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != results["environment"]:
+        print("⚠️  Baseline was recorded on a different machine or Python; comparisons may be noisy")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} stage(s) regressed:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+
+    print(f"✓ No stage regressed by more than {args.tolerance:.0%} against {baseline_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Check import time of serving modules against a startup budget.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` so
+results don't depend on what an earlier import already loaded. Exits non-zero
+if a module goes over budget or pulls in a training-only dependency.
+"""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative import time budget per module, in milliseconds
+IMPORT_BUDGET_MS = {
+    "core.config": 50,
+    "nlu.intent_classifier": 300,
+    "nlu.inference": 300,
+    "nlu.batching": 300,
+    "nlu.worker_pool": 300,
+    "nlu.prediction_cache": 50,
+    "nlu.onnx_backend": 300,
+    "nlu.mmap_loader": 300,
+    "nlu.sentence_encoder": 300,
+    "nlu.tokenizer": 50,
+    "nlu.ner_extractor": 50,
+    "nlu.entity_rules": 50,
+    "nlu.validators": 50,
+    "nlu.cascade": 50,
+    "nlu.baseline_classifier": 300,
+    "dialogue.state_machine": 50,
+    "dialogue.session_store": 50,
+    "dialogue.history": 50,
+    "tools.bank_api_adapter": 50,
+    "tools.ann_index": 300,
+    "tools.faq_retriever": 300,
+    "data_src.pii_handler": 50,
+    "api.main": 2500,
+}
+
+# Must not be imported just by importing serving code (only on first use)
+LAZY_MODULES = ["torch", "transformers", "datasets", "sklearn", "spacy", "onnxruntime"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s+(\S+)")
+
+def measure(module: str):
+    """Return (cumulative import ms, heavy modules loaded) for one module."""
+    code = (
+        "import sys; "
+        f"sys.path.insert(0, {str(PROJECT_ROOT)!r}); "
+        f"import {module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=PROJECT_ROOT,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    cumulative_us = 0
+    for match in _IMPORTTIME_LINE.finditer(proc.stderr):
+        if match.group(2) == module:
+            cumulative_us = int(match.group(1))
+
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, loaded
+
+def main() -> int:
+    print("\n" + "="*60)
+    print("STARTUP IMPORT-TIME BUDGET")
+    print("="*60)
+
+    failures = []
+    for module, budget in IMPORT_BUDGET_MS.items():
+        elapsed, loaded = measure(module)
+        ok = elapsed <= budget and not loaded
+        print(f"{'✓' if ok else '❌'} {module:<28} {elapsed:8.1f} ms (budget {budget} ms)"
+              + (f"  eager: {', '.join(loaded)}" if loaded else ""))
+        if not ok:
+            failures.append(module)
+
+    if failures:
+        print(f"\n{len(failures)} module(s) over budget: {', '.join(failures)}")
+        return 1
+
+    print("\n✓ All modules within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+"""Bulk-score archived transcripts: PII redaction, intent and optionally NER.
+
+Streams a JSONL or CSV file of utterances in chunks through a pool of
+worker processes and appends results to JSONL (one file) or Parquet (a
+directory of part files). After every written chunk a checkpoint records
+the input byte offset and output position, so an interrupted run picks up
+where it stopped when started again with the same arguments.
+
+    python scripts/score_transcripts.py archive.csv scored.parquet --ner
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.config import load_config
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+# ---------- input ----------
+def iter_records(path: Path, offset: int = 0) -> Iterator[Tuple[int, Dict]]:
+    """Yield (byte offset just past the record, record) from ``offset`` on; CSV rows become dicts keyed by the header."""
+    with open(path, "rb") as f:
+        fields = None
+        if path.suffix.lower() == ".csv":
+            header = f.readline()
+            fields = next(csv.reader([header.decode("utf-8-sig")]))
+            offset = max(offset, len(header))
+        f.seek(offset)
+        position = offset
+
+        def lines():
+            nonlocal position
+            for line in f:
+                position += len(line)
+                yield line
+
+        if fields is None:
+            for line in lines():
+                if line.strip():
+                    yield position, json.loads(line)
+        else:
+            # csv.reader pulls lines lazily, so ``position`` is at the end of the row it just returned
+            for row in csv.reader(line.decode("utf-8") for line in lines()):
+                if row:
+                    yield position, dict(zip(fields, row))
+
+def iter_chunks(records: Iterator[Tuple[int, Dict]], chunk_size: int) -> Iterator[Tuple[int, List[Dict]]]:
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk[-1][0], [record for _, record in chunk]
+
+# ---------- workers ----------
+_worker: Dict = {}
+
+def _init_worker(model_path: str, backend: str, quantize: bool, threads: int, ner: bool, spacy_model: str):
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+
+    from data_src.pii_handler import PIIRedactor
+    from nlu.intent_classifier import IntentClassifier
+
+    classifier = IntentClassifier(device="cpu")
+    classifier.load_model(model_path, backend=backend, intra_op_threads=threads, quantize=quantize, mmap_weights=True)
+    _worker["classifier"] = classifier
+    _worker["redactor"] = PIIRedactor()
+    if ner:
+        from nlu.ner_extractor import NERExtractor
+        _worker["ner"] = NERExtractor(spacy_model)
+
+def _score_chunk(texts: List[str]) -> List[Dict]:
+    """Redact, classify and (optionally) extract entities for one chunk; only redacted text leaves the worker."""
+    redacted = [_worker["redactor"].redact(text) for text in texts]
+    clean = [text for text, _ in redacted]
+    predictions = _worker["classifier"].predict_batch(clean, return_probs=True)
+
+    results = []
+    for (text, pii_found), prediction in zip(redacted, predictions):
+        result = {
+            "text": text,
+            "pii_types": sorted(pii_found),
+            "intent": prediction["intent"],
+            "confidence": prediction["confidence"],
+            "top_k": prediction.get("top_k", []),
+        }
+        if "ner" in _worker:
+            result["entities"] = _worker["ner"].extract_entities(text)
+        results.append(result)
+    return results
+
+# ---------- output ----------
+class JsonlSink:
+    def __init__(self, path: Path, resume_from: int = 0):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if resume_from and (not path.exists() or path.stat().st_size < resume_from):
+            raise ValueError(
+                f"{path} is missing or shorter than its checkpoint (byte {resume_from}); pass --restart to start over"
+            )
+        self.f = open(path, "r+b" if resume_from else "wb")
+        # Drop anything written after the last checkpoint
+        self.f.truncate(resume_from)
+        self.f.seek(resume_from)
+
+    def write(self, rows: List[Dict]):
+        self.f.write("".join(json.dumps(row) + "\n" for row in rows).encode("utf-8"))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+
+    @property
+    def position(self) -> int:
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+class ParquetSink:
+    """One Parquet part file per chunk in an output directory (readable with pandas.read_parquet(dir))."""
+
+    def __init__(self, path: Path, resume_from: int = 0):
+        try:
+            import pyarrow  # noqa: F401  # optional: only needed for Parquet output
+        except ImportError:
+            raise ImportError("pyarrow is required for Parquet output: pip install pyarrow")
+
+        self.path = path
+        path.mkdir(parents=True, exist_ok=True)
+        self.next_part = resume_from
+        for stale in path.glob("part-*.parquet"):
+            if int(stale.stem.split("-")[1]) >= resume_from:
+                stale.unlink()
+
+    def write(self, rows: List[Dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Entity values mix types across slots, so keep them as JSON text
+        rows = [dict(row, entities=json.dumps(row["entities"])) if "entities" in row else row for row in rows]
+        tmp = self.path / f".part-{self.next_part:05d}.parquet.tmp"
+        pq.write_table(pa.Table.from_pylist(rows), tmp)
+        os.replace(tmp, self.path / f"part-{self.next_part:05d}.parquet")
+        self.next_part += 1
+
+    @property
+    def position(self) -> int:
+        return self.next_part
+
+    def close(self):
+        pass
+
+# ---------- checkpoint ----------
+def _input_signature(path: Path) -> Dict:
+    stat = path.stat()
+    return {"input": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+def load_checkpoint(path: Path, input_path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        checkpoint = json.load(f)
+    if {k: checkpoint.get(k) for k in ("input", "size", "mtime")} != _input_signature(input_path):
+        raise ValueError(f"{path} belongs to a different or modified input; pass --restart to start over")
+    return checkpoint
+
+def save_checkpoint(path: Path, input_path: Path, input_offset: int, output_position: int, rows: int):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(dict(_input_signature(input_path), input_offset=input_offset, output_position=output_position, rows=rows), f)
+    os.replace(tmp, path)
+
+# ---------- main ----------
+def score_file(
+    input_path: str,
+    output_path: str,
+    model_path: str,
+    text_field: str = "text",
+    id_field: Optional[str] = None,
+    ner: bool = False,
+    spacy_model: str = "en_core_web_sm",
+    backend: str = "torch",
+    quantize: bool = False,
+    workers: int = 0,
+    threads_per_worker: int = 1,
+    chunk_size: int = 1024,
+    restart: bool = False,
+) -> Dict:
+    from nlu.worker_pool import available_cores
+
+    input_path, output_path = Path(input_path), Path(output_path)
+    checkpoint_path = output_path.with_name(output_path.name + CHECKPOINT_SUFFIX)
+    if restart and checkpoint_path.exists():
+        checkpoint_path.unlink()
+    checkpoint = load_checkpoint(checkpoint_path, input_path) or {"input_offset": 0, "output_position": 0, "rows": 0}
+    if checkpoint["rows"]:
+        print(f"Resuming after {checkpoint['rows']} rows (byte {checkpoint['input_offset']})")
+
+    sink_cls = ParquetSink if output_path.suffix.lower() == ".parquet" else JsonlSink
+    sink = sink_cls(output_path, resume_from=checkpoint["output_position"])
+    workers = workers or max(1, len(available_cores()) // threads_per_worker)
+    print(f"Scoring {input_path} with {workers} workers x {threads_per_worker} threads → {output_path}")
+
+    rows = checkpoint["rows"]
+    scored = 0
+    start = last_report = time.perf_counter()
+    # Throughput is measured from the first finished chunk so worker start-up (model loading) doesn't dilute it
+    steady_start, steady_rows = None, 0
+    pending = deque()
+
+    def rate() -> float:
+        now = time.perf_counter()
+        if steady_start is not None and scored > steady_rows:
+            return (scored - steady_rows) / (now - steady_start)
+        return scored / (now - start)  # a single chunk: nothing to separate start-up from
+
+    def write_next():
+        nonlocal rows, scored, last_report, steady_start, steady_rows
+        input_offset, ids, future = pending.popleft()
+        results = future.result()
+        for row_id, result in zip(ids, results):
+            result["id"] = row_id
+        sink.write(results)
+        rows += len(results)
+        scored += len(results)
+        save_checkpoint(checkpoint_path, input_path, input_offset, sink.position, rows)
+
+        now = time.perf_counter()
+        if steady_start is None:
+            steady_start, steady_rows, last_report = now, scored, now
+            print(f"  workers ready after {now - start:.1f}s")
+        elif now - last_report >= 5.0:
+            print(f"  {rows} rows ({rate():.0f} rows/sec)")
+            last_report = now
+
+    ctx = mp.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(model_path, backend, quantize, threads_per_worker, ner, spacy_model),
+        ) as pool:
+            chunks = iter_chunks(iter_records(input_path, checkpoint["input_offset"]), chunk_size)
+            for input_offset, records in chunks:
+                base = rows + sum(len(p[1]) for p in pending)
+                ids = [record.get(id_field) if id_field else base + i for i, record in enumerate(records)]
+                texts = [str(record.get(text_field) or "") for record in records]
+                pending.append((input_offset, ids, pool.submit(_score_chunk, texts)))
+                # Bounded read-ahead keeps memory flat however large the input is
+                if len(pending) >= 2 * workers:
+                    write_next()
+            while pending:
+                write_next()
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {rows} rows; run the same command again to resume")
+        raise SystemExit(130)
+    finally:
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    checkpoint_path.unlink(missing_ok=True)
+    summary = {"rows": rows, "scored_this_run": scored, "seconds": elapsed, "rows_per_sec": rate()}
+    print(f"✓ Scored {scored} rows in {elapsed:.1f}s ({summary['rows_per_sec']:.0f} rows/sec), {rows} total in {output_path}")
+    return summary
+
+def main():
+    config = load_config()
+    serving = config.get("serving", {})
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL or CSV of utterances")
+    parser.add_argument("output", help="*.jsonl file or *.parquet directory")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", help="column to copy into the output 'id' (default: row number)")
+    parser.add_argument("--model", default=config.get("models", {}).get("intent_classifier", "models/distilbert_intent"))
+    parser.add_argument("--backend", default=serving.get("backend", "torch"), choices=["torch", "onnx"])
+    parser.add_argument("--quantize", action="store_true", default=serving.get("quantization", {}).get("enabled", False))
+    parser.add_argument("--ner", action="store_true", help="also extract entities")
+    parser.add_argument("--spacy-model", default=serving.get("ner", {}).get("spacy_model", "en_core_web_sm"))
+    parser.add_argument("--workers", type=int, default=0, help="0 = available cores // threads per worker")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=1024, help="rows per batch and per checkpoint")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    score_file(
+        args.input, args.output, args.model,
+        text_field=args.text_field, id_field=args.id_field, ner=args.ner, spacy_model=args.spacy_model,
+        backend=args.backend, quantize=args.quantize, workers=args.workers,
+        threads_per_worker=args.threads_per_worker, chunk_size=args.chunk_size, restart=args.restart,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,11 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from data_src.data_generator import DialogueGenerator
+from core.config import PROJECT_ROOT, load_config
 from data_src.data_loader import DataLoader, prepare_datasets
-from nlu.intent_classifier import IntentClassifier
+from nlu.intent_classifier import IntentClassifier, resolve_load_path
+from nlu.baseline_classifier import BaselineClassifier
+from nlu.cascade import CascadeClassifier
 
 def generate_data():
     """Generate synthetic data."""
@@ -30,26 +33,169 @@ def prepare_data():
 
     prepare_datasets()
 
+def train_baseline():
+    """Train the TF-IDF baseline (first tier of the cascade)."""
+    print("\n" + "="*60)
+    print("STEP 3: Training TF-IDF Baseline")
+    print("="*60)
+
+    train = DataLoader.load_dialogues("data/processed/intents_train.jsonl")
+    val = DataLoader.load_dialogues("data/processed/intents_val.jsonl")
+
+    config = load_config()
+    target_accuracy = config.get("training", {}).get("baseline", {}).get("target_accuracy", 0.98)
+
+    baseline = BaselineClassifier()
+    baseline.train(train, val, target_accuracy=target_accuracy)
+    # Under the project root, where the API looks for it
+    baseline.save(PROJECT_ROOT / config.get("models", {}).get("baseline", "models/baseline_tfidf"))
+
+    m = baseline.metrics
+    print(f"✓ Val accuracy: {m['val_accuracy']:.3f}")
+    print(f"✓ Cascade threshold: {m['threshold']:.3f} "
+          f"(answers {m['coverage']:.1%} of val at {m['accepted_accuracy']:.3f} accuracy)")
+
 def train_intent_classifier():
     """Train intent classifier."""
     print("\n" + "="*60)
-    print("STEP 3: Training Intent Classifier")
+    print("STEP 4: Training Intent Classifier")
     print("="*60)
 
-    classifier = IntentClassifier()
+    params = dict(load_config().get("training", {}).get("intent", {}))
+    classifier = IntentClassifier(
+        model_name=params.pop("model_name", "distilbert-base-uncased"),
+        num_labels=params.pop("num_labels", 77),
+    )
 
     try:
         classifier.train(
             train_filepath="data/processed/intents_train.jsonl",
             val_filepath="data/processed/intents_val.jsonl",
             output_dir="models/distilbert_intent",
-            epochs=3,
-            batch_size=16
+            **params,
         )
         print("✓ Training completed")
     except Exception as e:
         print(f"Error: {e}")
 
+def distill_student():
+    """Distill the trained DistilBERT teacher into a smaller student."""
+    print("\n" + "="*60)
+    print("STEP 5: Distilling Student Intent Classifier")
+    print("="*60)
+
+    config = load_config()
+    params = config.get("training", {}).get("distillation", {})
+
+    try:
+        from models.distill import distill_intent_model
+        report = distill_intent_model(
+            teacher_dir="models/distilbert_intent",
+            train_filepath="data/processed/intents_train.jsonl",
+            val_filepath="data/processed/intents_val.jsonl",
+            output_dir=config.get("models", {}).get("student", "models/distilled_intent"),
+            **params,
+        )
+        if "student_val_accuracy" in report:
+            print(f"✓ Val accuracy: teacher {report['teacher_val_accuracy']:.3f}, "
+                  f"student {report['student_val_accuracy']:.3f}")
+    except Exception as e:
+        print(f"⚠️  Distillation skipped: {e}")
+
+def export_onnx():
+    """Export the intent classifier for ONNX Runtime serving."""
+    print("\n" + "="*60)
+    print("STEP 6: Exporting ONNX Model")
+    print("="*60)
+
+    try:
+        from models.export_model import export_intent_classifier
+        export_intent_classifier("models/distilbert_intent")
+    except Exception as e:
+        print(f"⚠️  ONNX export skipped: {e}")
+
+def quantize_intent_classifier():
+    """Build the INT8 serving model, kept only if it passes the accuracy gate."""
+    print("\n" + "="*60)
+    print("STEP 7: Quantizing Intent Classifier (INT8)")
+    print("="*60)
+
+    tolerance = load_config().get("serving", {}).get("quantization", {}).get("f1_tolerance", 0.01)
+
+    try:
+        from models.export_model import quantize_intent_classifier as quantize
+        val_data = DataLoader.load_dialogues("data/processed/intents_val.jsonl")
+    except Exception as e:
+        print(f"⚠️  Quantization skipped: {e}")
+        return
+
+    # One backend failing (e.g. no ONNX export) must not skip the other
+    for backend in ("torch", "onnx"):
+        try:
+            quantize("models/distilbert_intent", val_data, backend=backend, f1_tolerance=tolerance)
+        except Exception as e:
+            print(f"⚠️  {backend} quantization skipped: {e}")
+
+def evaluate_cascade():
+    """Write the intent model's evaluation report, then report how much traffic the baseline absorbs."""
+    print("\n" + "="*60)
+    print("STEP 8: Evaluating Intent Model and Cascade")
+    print("="*60)
+
+    try:
+        from models.evaluate import evaluate_model, print_summary, save_report
+
+        test_data = DataLoader.load_dialogues("data/processed/intents_test.jsonl")
+        transformer = IntentClassifier()
+        transformer.load_model("models/distilbert_intent")
+        intent_report = evaluate_model(transformer, test_data)
+        print_summary(intent_report)
+        print(f"✓ Evaluation report: {save_report(intent_report, 'intent')}")
+
+        baseline = BaselineClassifier()
+        baseline.load(resolve_load_path(load_config().get("models", {}).get("baseline", "models/baseline_tfidf")))
+
+        report = CascadeClassifier(baseline, transformer).evaluate(test_data)
+        print(f"✓ Baseline hit rate: {report['hit_rate']:.1%}")
+        print(f"✓ Accuracy: overall {report['accuracy']:.3f}, "
+              f"baseline tier {report['baseline_accuracy']:.3f}, "
+              f"transformer tier {report['transformer_accuracy']:.3f}")
+    except Exception as e:
+        print(f"⚠️  Cascade evaluation skipped: {e}")
+
+def build_faq_index():
+    """Embed the FAQ questions with the trained encoder and calibrate min_score, for the API to memory-map."""
+    print("\n" + "="*60)
+    print("STEP 9: Building FAQ Index")
+    print("="*60)
+
+    try:
+        from nlu.sentence_encoder import SentenceEncoder
+        from tools.faq_retriever import FAQRetriever
+
+        config = load_config()
+        faq = config.get("serving", {}).get("faq", {})
+        retriever = FAQRetriever(
+            SentenceEncoder(resolve_load_path("models/distilbert_intent")),
+            use_ann=faq.get("use_ann"),
+            nprobe=faq.get("nprobe", 8),
+            rerank=faq.get("rerank", 0),
+        )
+        retriever.build_index()
+
+        # Validation queries of intents the FAQ does not answer must not get an FAQ answer
+        faq_intents = set(faq.get("intents", ()))
+        val = DataLoader.load_dialogues("data/processed/intents_val.jsonl")
+        negatives = [d["text"] for d in val if d["intent"] not in faq_intents]
+        retriever.calibrate_threshold(negatives, target_precision=faq.get("target_precision", 0.95))
+        m = retriever.metrics
+        print(f"✓ FAQ min_score: {m['min_score']:.3f} (recalls {m['paraphrase_recall']:.1%} of paraphrases, "
+              f"answers {m['negatives_answered']:.1%} of other queries)")
+        # Under the project root, where the API looks for it
+        retriever.save_index(PROJECT_ROOT / config.get("models", {}).get("faq_index", "models/faq_index"))
+    except Exception as e:
+        print(f"⚠️  FAQ index skipped: {e}")
+
 def main():
     print("\n" + "="*60)
     print("BANKING CHATBOT - TRAINING PIPELINE")
@@ -57,7 +203,13 @@ def main():
 
     generate_data()
     prepare_data()
+    train_baseline()
     train_intent_classifier()
+    distill_student()
+    export_onnx()
+    quantize_intent_classifier()
+    evaluate_cascade()
+    build_faq_index()
 
     print("\n" + "="*60)
     print("TRAINING COMPLETE!")
@@ -0,0 +1,15 @@
+"""Command-line entry points start outside the repository root."""
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def test_evaluate_cli_help(tmp_path):
+    result = subprocess.run(
+        [sys.executable, str(PROJECT_ROOT / "models" / "evaluate.py"), "--help"],
+        cwd=tmp_path, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    assert "usage:" in result.stdout
@@ -0,0 +1,37 @@
+"""Rule-based slot extraction and rendering of normalized slot values."""
+import pytest
+
+from dialogue.state_machine import DialogueManager
+from nlu.entity_rules import EntityRuleEngine
+from tools.bank_api_adapter import BankingAPIAdapter
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return EntityRuleEngine()
+
+
+def _slots(rules, text):
+    return {e["type"]: e["value"] for e in rules.extract(text)}
+
+
+def test_checking_as_verb_is_not_an_account(rules):
+    assert _slots(rules, "I was checking my card ending in 1234") == {"card_last4": "1234"}
+
+
+@pytest.mark.parametrize("text", ["what's my checking balance", "checking account please", "how much is in checking"])
+def test_checking_as_account(rules, text):
+    assert _slots(rules, text)["account_type"] == "checking"
+
+
+def test_balance_response_renders_normalized_account():
+    class Classifier:
+        def predict(self, text, **kwargs):
+            return ("get_balance", 0.9)
+
+    manager = DialogueManager(Classifier(), backend_adapter=BankingAPIAdapter())
+    manager.process_message("s", "what's my balance")
+    result = manager.process_message("s", "credit card")
+
+    assert result["slots"]["account_type"] == "credit_card"
+    assert result["response"].startswith("Credit card account balance:")
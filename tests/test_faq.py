@@ -0,0 +1,78 @@
+"""FAQ answers: calibrated min_score and the explicit informational-intent list."""
+import numpy as np
+
+from dialogue.state_machine import DialogueManager
+from tools.faq_retriever import FAQRetriever
+
+FAQS = [
+    {"q": "How do I reset my password?", "a": "Visit settings > Change Password"},
+    {"q": "What are ATM fees?", "a": "$2.50 per out-of-network withdrawal"},
+]
+
+
+class KeywordEncoder:
+    """Unit vectors over a small vocabulary plus a shared component, so unrelated text still scores > 0.5."""
+
+    VOCAB = ("password", "atm", "balance", "transfer")
+
+    def encode(self, texts):
+        vectors = np.array(
+            [[2.0] + [float(word in text.lower()) for word in self.VOCAB] for text in texts], dtype=np.float32
+        )
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FixedClassifier:
+    def __init__(self, intent):
+        self.intent = intent
+
+    def predict(self, text, **kwargs):
+        return self.intent, 0.95
+
+
+def _retriever():
+    return FAQRetriever(KeywordEncoder(), faqs=[dict(faq) for faq in FAQS]).build_index()
+
+
+def test_calibrated_min_score_rejects_unrelated_queries():
+    retriever = _retriever()
+    paraphrases = [
+        {"text": "forgot my password", "q": FAQS[0]["q"]},
+        {"text": "atm withdrawal cost", "q": FAQS[1]["q"]},
+    ]
+    negatives = ["what is my balance", "send a transfer to mom", "hello there"]
+
+    threshold = retriever.calibrate_threshold(negatives, paraphrases, target_precision=1.0)
+
+    assert retriever.retrieve("what is my balance", top_k=1)[0]["score"] > 0.5
+    assert retriever.retrieve("what is my balance", top_k=1)[0]["score"] < threshold
+    assert retriever.metrics["paraphrase_recall"] == 1.0
+    assert retriever.metrics["negatives_answered"] == 0.0
+
+
+def test_min_score_is_saved_with_the_index(tmp_path):
+    retriever = _retriever()
+    retriever.calibrate_threshold(["what is my balance"], [{"text": "forgot my password", "q": FAQS[0]["q"]}])
+    retriever.save_index(tmp_path)
+
+    loaded = FAQRetriever(KeywordEncoder(), faqs=[]).load_index(tmp_path)
+
+    assert loaded.min_score == retriever.min_score
+    assert DialogueManager(FixedClassifier("atm_support"), faq_retriever=loaded).faq_min_score == loaded.min_score
+
+
+def test_only_listed_intents_are_answered_from_faq():
+    retriever = _retriever()
+    retriever.min_score = 0.9
+
+    listed = DialogueManager(FixedClassifier("atm_support"), faq_retriever=retriever, faq_intents=["atm_support"])
+    unlisted = DialogueManager(FixedClassifier("card_arrival"), faq_retriever=retriever, faq_intents=["atm_support"])
+
+    assert listed.process_message("s", "atm fees?")["action"] == "answer_faq"
+    assert unlisted.process_message("s", "when does my atm card arrive?")["action"] != "answer_faq"
+
+
+def test_uncalibrated_retriever_never_answers():
+    manager = DialogueManager(FixedClassifier("atm_support"), faq_retriever=_retriever(), faq_intents=["atm_support"])
+
+    assert manager.process_message("s", "atm fees?")["action"] != "answer_faq"
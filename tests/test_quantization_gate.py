@@ -0,0 +1,44 @@
+"""INT8 loading requires an accuracy-gate approval for the current weights."""
+import json
+
+import pytest
+
+from nlu.intent_classifier import QUANTIZATION_REPORT_FILE, IntentClassifier, weights_fingerprint
+
+
+def _approve(model_dir, backend="torch", **overrides):
+    report = {backend: dict({"accepted": True, "weights_sha256": weights_fingerprint(model_dir, backend)}, **overrides)}
+    (model_dir / QUANTIZATION_REPORT_FILE).write_text(json.dumps(report))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    (tmp_path / "model.safetensors").write_bytes(b"fp32 weights v1")
+    return tmp_path
+
+
+def test_approval_for_current_weights_passes(model_dir):
+    _approve(model_dir)
+    IntentClassifier()._check_quantization_gate(model_dir, "torch")
+
+
+def test_retrained_weights_invalidate_approval(model_dir):
+    _approve(model_dir)
+    (model_dir / "model.safetensors").write_bytes(b"fp32 weights v2")
+
+    with pytest.raises(ValueError, match="different weights"):
+        IntentClassifier()._check_quantization_gate(model_dir, "torch")
+
+
+def test_approval_without_weights_hash_is_rejected(model_dir):
+    _approve(model_dir, weights_sha256=None)
+
+    with pytest.raises(ValueError, match="different weights"):
+        IntentClassifier()._check_quantization_gate(model_dir, "torch")
+
+
+def test_rejected_model_is_not_loaded(model_dir):
+    _approve(model_dir, accepted=False)
+
+    with pytest.raises(ValueError, match="has not passed"):
+        IntentClassifier()._check_quantization_gate(model_dir, "torch")
@@ -0,0 +1,30 @@
+"""Resuming JSONL output from a checkpoint."""
+import pytest
+
+from scripts.score_transcripts import JsonlSink
+
+
+def test_resume_drops_rows_after_checkpoint(tmp_path):
+    path = tmp_path / "scored.jsonl"
+    path.write_bytes(b'{"a": 1}\n{"a": 2}\n')
+
+    sink = JsonlSink(path, resume_from=9)
+    sink.write([{"a": 3}])
+    sink.close()
+
+    assert path.read_bytes() == b'{"a": 1}\n{"a": 3}\n'
+
+
+@pytest.mark.parametrize("existing", [None, b'{"a": 1}\n'])
+def test_resume_needs_output_up_to_checkpoint(tmp_path, existing):
+    path = tmp_path / "scored.jsonl"
+    if existing is not None:
+        path.write_bytes(existing)
+
+    with pytest.raises(ValueError, match="--restart"):
+        JsonlSink(path, resume_from=18)
+
+    if existing is None:
+        assert not path.exists()
+    else:
+        assert path.read_bytes() == existing
@@ -0,0 +1,81 @@
+"""Slot-filling replies that bypass the intent classifier."""
+import pytest
+
+from dialogue.state_machine import DialogueManager
+from nlu.validators import EntityValidator
+
+
+class ScriptedClassifier:
+    """Returns the queued (intent, confidence) pairs in order and records every call."""
+
+    def __init__(self, *predictions):
+        self.predictions = list(predictions)
+        self.calls = []
+
+    def predict(self, text, **kwargs):
+        self.calls.append(text)
+        return self.predictions.pop(0)
+
+
+def _ner_extractor():
+    spacy = pytest.importorskip("spacy")
+    from nlu.ner_extractor import NERExtractor
+    return NERExtractor(nlp=spacy.blank("en"))
+
+
+@pytest.fixture(params=["no_ner", "ner"])
+def ner(request):
+    return _ner_extractor() if request.param == "ner" else None
+
+
+def _transfer_waiting_for_amount(classifier, ner):
+    manager = DialogueManager(classifier, ner_extractor=ner)
+    manager.process_message("s", "I want to move money")
+    manager.process_message("s", "from checking")
+    result = manager.process_message("s", "to savings")
+    assert result["action"] == "fill_slot"
+    assert manager.sessions.get("s").pending_slot == "amount"
+    return manager
+
+
+def test_changed_mind_reply_goes_to_classifier(ner):
+    classifier = ScriptedClassifier(("transfer_money", 0.9), ("transaction_history", 0.9))
+    manager = _transfer_waiting_for_amount(classifier, ner)
+
+    result = manager.process_message("s", "no, show my last 3 transactions")
+
+    assert classifier.calls[-1] == "no, show my last 3 transactions"
+    assert result["intent"] == "transaction_history"
+    assert "amount" not in result["slots"]
+    assert result["state"] != "verification"
+
+
+def test_thousands_amount_in_high_risk_flow(ner):
+    classifier = ScriptedClassifier(("transfer_money", 0.9))
+    manager = _transfer_waiting_for_amount(classifier, ner)
+
+    result = manager.process_message("s", "$1,000")
+
+    assert classifier.calls == ["I want to move money"]  # the replies never reached the model
+    assert result["intent"] == "transfer_money"
+    assert result["slots"]["amount"] == {"amount": 1000.0, "currency": "USD"}
+    assert result["state"] == "verification"
+
+
+@pytest.mark.parametrize("reply", ["savings", "my savings account", "Savings, please"])
+def test_account_reply_with_filler_is_bypassed(reply):
+    classifier = ScriptedClassifier(("get_balance", 0.9))
+    manager = DialogueManager(classifier)
+    manager.process_message("s", "what's my balance")
+
+    result = manager.process_message("s", reply)
+
+    assert len(classifier.calls) == 1
+    assert result["slots"]["account_type"] == "savings"
+
+
+def test_parse_amount_thousands_separators():
+    assert EntityValidator.parse_amount("$1,000")["amount"] == 1000.0
+    assert EntityValidator.parse_amount("send 12,345.67 EUR")["amount"] == 12345.67
+    assert EntityValidator.parse_amount("$1,000", full_match=True) == {"amount": 1000.0, "currency": "USD"}
+    assert EntityValidator.parse_amount("last 3 transactions", full_match=True) is None
@@ -0,0 +1,18 @@
+"""Serving code must not import training-only or model-runtime dependencies at import time."""
+import pytest
+
+from scripts.check_startup_time import IMPORT_BUDGET_MS, LAZY_MODULES, measure
+
+
+def test_api_main_loads_no_heavy_dependencies():
+    _, loaded = measure("api.main")
+
+    assert not loaded, f"importing api.main loaded {', '.join(loaded)}"
+    assert set(LAZY_MODULES) >= {"torch", "transformers", "spacy", "sklearn", "datasets", "onnxruntime"}
+
+
+@pytest.mark.parametrize("module", sorted(m for m in IMPORT_BUDGET_MS if m != "api.main"))
+def test_serving_module_loads_no_heavy_dependencies(module):
+    _, loaded = measure(module)
+
+    assert not loaded, f"importing {module} loaded {', '.join(loaded)}"
@@ -0,0 +1,250 @@
+"""Approximate nearest-neighbour search (IVF + product quantization) in NumPy."""
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+def kmeans(vectors: np.ndarray, k: int, n_iter: int = 20, seed: int = 0, chunk_size: int = 65536) -> np.ndarray:
+    """Lloyd's k-means; returns (k, dim) float32 centroids. Empty clusters are reseeded."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=len(vectors) < k)].copy()
+
+    for _ in range(n_iter):
+        assignments = nearest_centroids(vectors, centroids, chunk_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=k)
+
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+    return centroids
+
+def nearest_centroids(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Index of the closest centroid (L2) for every vector, computed in chunks to bound memory."""
+    centroid_sq = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = vectors[start:start + chunk_size]
+        # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, and ||x||^2 doesn't change the argmin
+        out[start:start + chunk_size] = np.argmin(centroid_sq - 2.0 * chunk @ centroids.T, axis=1)
+    return out
+
+
+class IVFPQIndex:
+    """Inverted-file index with product-quantized residuals, for inner-product search.
+
+    Vectors are assigned to one of ``n_lists`` coarse centroids and stored as
+    ``n_subvectors`` one-byte codes of their residual, so a 768-d float32
+    embedding (3 KB) costs ``n_subvectors`` bytes plus an int64 id. A query
+    scans only the ``nprobe`` lists whose centroids score highest; per-list
+    scores come from a (n_subvectors, 256) lookup table computed once per query.
+
+    Tuning: raise ``nprobe`` for recall at the cost of latency; raise
+    ``n_subvectors`` for precision at the cost of memory. ``rerank`` > 0
+    re-scores that many candidates exactly when the caller passes the
+    original vectors to ``search``.
+
+    ``add`` and ``remove`` work after training. Removal tombstones ids, which
+    are skipped at search time and dropped for good by ``compact``.
+    """
+
+    def __init__(self, dim: int, n_lists: int = 256, n_subvectors: int = 16, nprobe: int = 8, seed: int = 0):
+        if dim % n_subvectors:
+            raise ValueError(f"dim ({dim}) must be divisible by n_subvectors ({n_subvectors})")
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_subvectors = n_subvectors
+        self.n_centroids = 256  # one byte per code
+        self.nprobe = nprobe
+        self.seed = seed
+
+        self.coarse_centroids: Optional[np.ndarray] = None  # (n_lists, dim)
+        self.codebooks: Optional[np.ndarray] = None  # (n_subvectors, 256, dim // n_subvectors)
+        self.list_codes = [np.empty((0, n_subvectors), dtype=np.uint8) for _ in range(n_lists)]
+        self.list_ids = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self.deleted = set()
+        self.next_id = 0
+
+    @property
+    def is_trained(self) -> bool:
+        return self.coarse_centroids is not None
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.list_ids) - len(self.deleted)
+
+    # ---------- build ----------
+    def train(self, vectors: np.ndarray, sample_size: int = 100000, n_iter: int = 20):
+        """Learn coarse centroids and residual codebooks from (a sample of) the data."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > sample_size:
+            vectors = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+
+        n_lists = min(self.n_lists, len(vectors))
+        self.coarse_centroids = kmeans(vectors, n_lists, n_iter=n_iter, seed=self.seed)
+        if n_lists < self.n_lists:
+            self.n_lists = n_lists
+            self.list_codes, self.list_ids = self.list_codes[:n_lists], self.list_ids[:n_lists]
+
+        residuals = vectors - self.coarse_centroids[nearest_centroids(vectors, self.coarse_centroids)]
+        sub = self.dim // self.n_subvectors
+        self.codebooks = np.stack([
+            kmeans(residuals[:, m * sub:(m + 1) * sub], self.n_centroids, n_iter=n_iter, seed=self.seed + m)
+            for m in range(self.n_subvectors)
+        ])
+        return self
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        sub = self.dim // self.n_subvectors
+        codes = np.empty((len(residuals), self.n_subvectors), dtype=np.uint8)
+        for m in range(self.n_subvectors):
+            codes[:, m] = nearest_centroids(residuals[:, m * sub:(m + 1) * sub], self.codebooks[m])
+        return codes
+
+    def add(self, vectors: np.ndarray, ids: Optional[Iterable[int]] = None) -> np.ndarray:
+        """Insert vectors (after train); returns their ids (auto-assigned if not given)."""
+        if not self.is_trained:
+            raise ValueError("Index not trained. Call train() first.")
+
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        if ids is None:
+            ids = np.arange(self.next_id, self.next_id + len(vectors), dtype=np.int64)
+        ids = np.asarray(list(ids), dtype=np.int64)
+        self.next_id = max(self.next_id, int(ids.max()) + 1 if len(ids) else 0)
+        if self.deleted.intersection(ids.tolist()):
+            # Re-using a removed id: drop the old entry first so it can't come back
+            self.compact()
+
+        lists = nearest_centroids(vectors, self.coarse_centroids)
+        codes = self._encode(vectors - self.coarse_centroids[lists])
+        for list_no in np.unique(lists):
+            members = lists == list_no
+            self.list_codes[list_no] = np.concatenate([self.list_codes[list_no], codes[members]])
+            self.list_ids[list_no] = np.concatenate([self.list_ids[list_no], ids[members]])
+        return ids
+
+    def remove(self, ids: Iterable[int]):
+        """Tombstone ids; they stop appearing in results immediately. Unknown ids are ignored."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        stored = np.concatenate(self.list_ids)
+        self.deleted.update(ids[np.isin(ids, stored)].tolist())
+
+    def compact(self):
+        """Physically drop tombstoned entries."""
+        if not self.deleted:
+            return
+        deleted = np.fromiter(self.deleted, dtype=np.int64)
+        for list_no in range(self.n_lists):
+            keep = ~np.isin(self.list_ids[list_no], deleted)
+            self.list_codes[list_no] = self.list_codes[list_no][keep]
+            self.list_ids[list_no] = self.list_ids[list_no][keep]
+        self.deleted.clear()
+
+    # ---------- search ----------
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        nprobe: Optional[int] = None,
+        rerank: int = 0,
+        vectors: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate top-k by inner product for each query.
+
+        Returns (scores, ids), both (n_queries, k), best first; missing slots
+        have id -1 and score -inf. With ``rerank`` and ``vectors`` (indexable
+        by id, e.g. a memory-mapped matrix), the best ``rerank`` candidates
+        are re-scored exactly before the final top-k.
+        """
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, self.dim)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        n_candidates = max(k, rerank) if vectors is not None else k
+        sub = self.dim // self.n_subvectors
+        deleted = np.fromiter(self.deleted, dtype=np.int64) if self.deleted else None
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        coarse = queries @ self.coarse_centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+        m_index = np.arange(self.n_subvectors)
+
+        for qi, query in enumerate(queries):
+            # q.(c + r) = q.c + sum_m q_m.r_m, so one lookup table serves every list
+            lut = np.einsum("msd,md->ms", self.codebooks, query.reshape(self.n_subvectors, sub))
+
+            scores, ids = [], []
+            for list_no in probes[qi]:
+                if not len(self.list_ids[list_no]):
+                    continue
+                scores.append(coarse[qi, list_no] + lut[m_index, self.list_codes[list_no]].sum(axis=1))
+                ids.append(self.list_ids[list_no])
+            if not ids:
+                continue
+
+            scores, ids = np.concatenate(scores), np.concatenate(ids)
+            if deleted is not None:
+                live = ~np.isin(ids, deleted)
+                scores, ids = scores[live], ids[live]
+
+            top = top_k_indices(scores, n_candidates)
+            scores, ids = scores[top], ids[top]
+            if vectors is not None and rerank:
+                scores = np.asarray(vectors[ids], dtype=np.float32) @ query
+                top = top_k_indices(scores, k)
+                scores, ids = scores[top], ids[top]
+
+            n = min(k, len(ids))
+            all_scores[qi, :n] = scores[:n]
+            all_ids[qi, :n] = ids[:n]
+
+        return all_scores, all_ids
+
+    # ---------- persistence ----------
+    def save(self, path: str):
+        """Write a single uncompressed .npz: centroids, codebooks, codes and ids concatenated per list."""
+        if not self.is_trained:
+            raise ValueError("Index not trained. Call train() first.")
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        offsets = np.cumsum([0] + [len(ids) for ids in self.list_ids]).astype(np.int64)
+        np.savez(
+            path,
+            params=np.array([self.dim, self.n_lists, self.n_subvectors, self.nprobe, self.seed, self.next_id], dtype=np.int64),
+            coarse_centroids=self.coarse_centroids,
+            codebooks=self.codebooks,
+            codes=np.concatenate(self.list_codes),
+            ids=np.concatenate(self.list_ids),
+            offsets=offsets,
+            deleted=np.fromiter(self.deleted, dtype=np.int64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFPQIndex":
+        with np.load(path) as data:
+            dim, n_lists, n_subvectors, nprobe, seed, next_id = (int(v) for v in data["params"])
+            index = cls(dim, n_lists=n_lists, n_subvectors=n_subvectors, nprobe=nprobe, seed=seed)
+            index.coarse_centroids = data["coarse_centroids"]
+            index.codebooks = data["codebooks"]
+            codes, ids, offsets = data["codes"], data["ids"], data["offsets"]
+            index.list_codes = [codes[offsets[i]:offsets[i + 1]] for i in range(n_lists)]
+            index.list_ids = [ids[offsets[i]:offsets[i + 1]] for i in range(n_lists)]
+            index.deleted = set(data["deleted"].tolist())
+            index.next_id = next_id
+        return index
+
+    def memory_bytes(self) -> int:
+        """Approximate in-memory size of the stored codes, ids and model."""
+        return (
+            sum(c.nbytes for c in self.list_codes) + sum(i.nbytes for i in self.list_ids)
+            + self.coarse_centroids.nbytes + self.codebooks.nbytes
+        )
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first (O(n) selection + O(k log k) sort)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
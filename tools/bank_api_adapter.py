@@ -5,6 +5,9 @@ from typing import Dict
 class BankingAPIAdapter:
     """Mock adapter for backend services."""
 
+    # Intents query() has a handler for; anything else only gets a generic acknowledgement
+    SUPPORTED_INTENTS = ("get_balance", "transaction_history", "transfer_money", "lost_or_stolen_card")
+
     def __init__(self):
         self.mock_accounts = {
             "checking": {"balance": 2450.32, "account_id": "****7890"},
@@ -1,11 +1,58 @@
 """FAQ retrieval using embeddings."""
-from typing import List, Dict
+import json
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from .ann_index import IVFPQIndex, top_k_indices
+
+EMBEDDINGS_FILE = "faq_embeddings.npy"
+ENTRIES_FILE = "faq_entries.json"
+ANN_FILE = "faq_ann.npz"
+META_FILE = "faq_meta.json"
+
+# Below this many entries exact search is fast enough and needs no training
+ANN_MIN_ENTRIES = 20000
 
 class FAQRetriever:
-    """Retrieve FAQs using embedding similarity."""
+    """Retrieve FAQs using embedding similarity.
+
+    FAQ questions are embedded once into unit-norm float32 vectors. Small
+    corpora are searched exactly: one matrix product per query batch and an
+    ``argpartition`` per row. From ``ANN_MIN_ENTRIES`` entries on (or with
+    ``use_ann=True``) an IVF-PQ index (tools/ann_index.py) is searched
+    instead, probing ``nprobe`` lists; ``rerank`` > 0 re-scores that many ANN
+    candidates against the full vectors, which are then kept memory-mapped.
+
+    Entries can be added and removed after the index is built; an entry's id
+    is its position in ``faq_db`` (removed entries become None).
+
+    ``min_score`` is the similarity above which the top hit is trusted as an
+    answer, calibrated on held-out paraphrases and non-FAQ queries and saved
+    with the index.
+    """
+
+    def __init__(
+        self,
+        encoder=None,
+        faqs: Optional[List[Dict]] = None,
+        use_ann: Optional[bool] = None,  # None = decide by corpus size
+        nprobe: int = 8,
+        rerank: int = 0,
+        ann_params: Optional[Dict] = None,  # IVFPQIndex(n_lists=..., n_subvectors=...)
+    ):
+        self.encoder = encoder  # nlu.sentence_encoder.SentenceEncoder; created on first use if None
+        self.faq_db = faqs if faqs is not None else self._load_faqs()
+        self.use_ann = use_ann
+        self.nprobe = nprobe
+        self.rerank = rerank
+        self.ann_params = ann_params or {}
 
-    def __init__(self):
-        self.faq_db = self._load_faqs()
+        self.embeddings: Optional[np.ndarray] = None
+        self.ann: Optional[IVFPQIndex] = None
+        self.min_score: Optional[float] = None
+        self.metrics: Dict = {}
 
     def _load_faqs(self) -> List[Dict]:
         """Load FAQ database."""
@@ -17,7 +64,169 @@ class FAQRetriever:
             {"q": "How do I update my address?", "a": "Go to settings > Personal Info"},
         ]
 
+    def _load_paraphrases(self) -> List[Dict]:
+        """Held-out rewordings of the default FAQ questions (never indexed), for calibration."""
+        return [
+            {"text": "I forgot my password, how can I change it?", "q": "How do I reset my password?"},
+            {"text": "Can't remember my login password", "q": "How do I reset my password?"},
+            {"text": "How much money can I send in one day?", "q": "What's the transfer limit?"},
+            {"text": "Is there a maximum amount per transfer?", "q": "What's the transfer limit?"},
+            {"text": "When will my transfer arrive?", "q": "How long do transfers take?"},
+            {"text": "How many days does a bank transfer need?", "q": "How long do transfers take?"},
+            {"text": "Do you charge for using another bank's ATM?", "q": "What are ATM fees?"},
+            {"text": "How much is a cash withdrawal fee?", "q": "What are ATM fees?"},
+            {"text": "I moved, where do I change my home address?", "q": "How do I update my address?"},
+            {"text": "How can I edit my mailing address?", "q": "How do I update my address?"},
+        ]
+
+    def _get_encoder(self):
+        if self.encoder is None:
+            from nlu.sentence_encoder import SentenceEncoder
+            self.encoder = SentenceEncoder()
+        return self.encoder
+
+    def _keeps_vectors(self) -> bool:
+        return self.ann is None or self.rerank > 0
+
+    # ---------- index ----------
+    def build_index(self):
+        """Embed every FAQ question, and train the ANN index for large corpora."""
+        embeddings = self._get_encoder().encode([faq["q"] for faq in self.faq_db])
+        use_ann = self.use_ann if self.use_ann is not None else len(self.faq_db) >= ANN_MIN_ENTRIES
+
+        self.ann = None
+        if use_ann:
+            self.ann = IVFPQIndex(embeddings.shape[1], nprobe=self.nprobe, **self.ann_params).train(embeddings)
+            self.ann.add(embeddings)
+        self.embeddings = embeddings if self._keeps_vectors() else None
+        return self
+
+    def calibrate_threshold(
+        self,
+        negatives: List[str],
+        paraphrases: Optional[List[Dict]] = None,
+        target_precision: float = 0.95,
+    ) -> float:
+        """Lowest ``min_score`` whose accepted top hits reach target_precision.
+
+        ``paraphrases`` are ``{"text", "q"}`` pairs (a held-out query and the
+        FAQ question it should retrieve); ``negatives`` are queries no FAQ
+        answers, so accepting any of them counts as a wrong answer. Returns a
+        value above 1.0 (never answer) if no threshold reaches the target.
+        """
+        paraphrases = paraphrases if paraphrases is not None else self._load_paraphrases()
+        queries = [p["text"] for p in paraphrases] + list(negatives)
+        hits = self.retrieve_batch(queries, top_k=1)
+
+        scores = np.array([row[0]["score"] if row else -np.inf for row in hits])
+        correct = np.array(
+            [bool(row) and row[0]["q"] == p["q"] for p, row in zip(paraphrases, hits)]
+            + [False] * len(negatives)
+        )
+
+        order = np.argsort(-scores)
+        cumulative_precision = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+        passing = np.nonzero(cumulative_precision >= target_precision)[0]
+
+        threshold = float(scores[order][passing.max()]) if len(passing) else 1.01
+        accepted = scores >= threshold
+        n = len(paraphrases)
+        self.min_score = threshold
+        self.metrics = {
+            "target_precision": target_precision,
+            "min_score": threshold,
+            "paraphrase_recall": float(correct[:n][accepted[:n]].sum() / n) if n else 0.0,
+            "negatives_answered": float(accepted[n:].mean()) if negatives else 0.0,
+            "n_paraphrases": n,
+            "n_negatives": len(negatives),
+        }
+        return threshold
+
+    def add_faqs(self, faqs: List[Dict]) -> List[int]:
+        """Embed and insert new entries without rebuilding; returns their ids."""
+        if self.embeddings is None and self.ann is None:
+            self.build_index()
+
+        ids = list(range(len(self.faq_db), len(self.faq_db) + len(faqs)))
+        embeddings = self._get_encoder().encode([faq["q"] for faq in faqs])
+        self.faq_db.extend(faqs)
+        if self.ann is not None:
+            self.ann.add(embeddings, ids=ids)
+        if self._keeps_vectors():
+            self.embeddings = np.vstack([self.embeddings, embeddings])
+        return ids
+
+    def remove_faqs(self, ids: List[int]):
+        """Remove entries by id; they stop being returned immediately."""
+        for i in ids:
+            self.faq_db[i] = None
+        if self.ann is not None:
+            self.ann.remove(ids)
+
+    def save_index(self, index_dir: str):
+        out = Path(index_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        if self.embeddings is None and self.ann is None:
+            self.build_index()
+
+        if self.embeddings is not None:
+            np.save(out / EMBEDDINGS_FILE, self.embeddings)
+        if self.ann is not None:
+            self.ann.save(out / ANN_FILE)
+        with open(out / ENTRIES_FILE, "w") as f:
+            json.dump(self.faq_db, f, indent=2)
+        with open(out / META_FILE, "w") as f:
+            json.dump({"min_score": self.min_score, "metrics": self.metrics}, f, indent=2)
+        print(f"✓ FAQ index ({len(self.faq_db)} entries{', IVF-PQ' if self.ann else ''}) saved to {out}")
+
+    def load_index(self, index_dir: str):
+        """Load a saved index; embeddings are memory-mapped, not read into memory."""
+        index_dir = Path(index_dir)
+        with open(index_dir / ENTRIES_FILE, "r") as f:
+            self.faq_db = json.load(f)
+        meta_file = index_dir / META_FILE
+        if meta_file.exists():
+            with open(meta_file, "r") as f:
+                meta = json.load(f)
+            self.min_score = meta.get("min_score")
+            self.metrics = meta.get("metrics", {})
+
+        self.ann = IVFPQIndex.load(index_dir / ANN_FILE) if (index_dir / ANN_FILE).exists() else None
+        embeddings_file = index_dir / EMBEDDINGS_FILE
+        self.embeddings = np.load(embeddings_file, mmap_mode="r") if embeddings_file.exists() else None
+        if self.embeddings is None and self._keeps_vectors():
+            raise FileNotFoundError(f"{embeddings_file} is needed for exact search or reranking")
+        return self
+
+    # ---------- search ----------
     def retrieve(self, query: str, top_k: int = 3) -> List[Dict]:
         """Retrieve top-k FAQs matching query."""
-        # Simple implementation - return top_k
-        return self.faq_db[:min(top_k, len(self.faq_db))]
+        return self.retrieve_batch([query], top_k=top_k)[0]
+
+    def retrieve_batch(self, queries: List[str], top_k: int = 3) -> List[List[Dict]]:
+        """Top-k FAQs for each query, best first, each with a cosine ``score``."""
+        if not queries:
+            return []
+        if self.embeddings is None and self.ann is None:
+            self.build_index()
+
+        query_vectors = self._get_encoder().encode(queries)
+        if self.ann is not None:
+            scores, ids = self.ann.search(
+                query_vectors, k=top_k, nprobe=self.nprobe,
+                rerank=self.rerank, vectors=self.embeddings if self.rerank else None,
+            )
+            return [
+                [dict(self.faq_db[i], score=float(s)) for s, i in zip(row_scores, row_ids) if i >= 0]
+                for row_scores, row_ids in zip(scores, ids)
+            ]
+
+        scores = query_vectors @ np.asarray(self.embeddings).T
+        removed = [i for i, faq in enumerate(self.faq_db) if faq is None]
+        if removed:
+            scores[:, removed] = -np.inf
+        live = len(self.faq_db) - len(removed)
+        return [
+            [dict(self.faq_db[i], score=float(row[i])) for i in top_k_indices(row, min(top_k, live))]
+            for row in scores
+        ]